@@ -0,0 +1,417 @@
+"""HideMyEmail uchun o'tkazuvchanlik/kechikish benchmarklari.
+
+Har bir ssenariy alohida o'rinbosar serverga (`bench.server`) qarshi
+ishlaydi va so'rov/soniya, p50/p99 kechikish hamda eng yuqori RSS ni
+hisobot qiladi. Bir nechta ssenariy tanlansa har biri alohida jarayonda
+bajariladi, shuning uchun RSS faqat shu ssenariyga tegishli. Natijani
+JSON ga saqlab, keyingi relizda `--baseline` orqali solishtirish mumkin.
+
+Ishga tushirish:
+    python -m bench.run --requests 200 --concurrency 10 --list-size 10000
+    python -m bench.run --json bench_v1.json
+    python -m bench.run --baseline bench_v1.json --tolerance 0.15
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from bench.server import MockHideMyEmail, ServerOptions, start_server
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Jarayonning eng yuqori RSS qiymati (MB), aniqlab bo'lmasa None"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linuxda KB, macOS da baytlarda qaytadi
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[idx]
+
+
+async def measure(
+    name: str,
+    operation: Callable[[], Awaitable[Any]],
+    requests: int,
+    concurrency: int,
+    transport=None,
+) -> Dict[str, Any]:
+    """`operation` ni `requests` marta, `concurrency` parallellikda bajaradi"""
+    before = transport.stats.as_dict() if transport is not None else None
+    latencies: List[float] = []
+    failures = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal failures
+        for _ in counter:
+            started = time.perf_counter()
+            try:
+                ok = await operation()
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            if not ok:
+                failures += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    elapsed = time.perf_counter() - started
+
+    connections = None
+    if transport is not None:
+        after = transport.stats.as_dict()
+        connections = {key: after[key] - before[key] for key in after}
+
+    return {
+        "name": name,
+        "requests": requests,
+        "concurrency": concurrency,
+        "failures": failures,
+        "elapsed_s": round(elapsed, 4),
+        "rps": round(requests / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+        "connections": connections,
+    }
+
+
+def _point_at(hme, base_url: str):
+    hme.base_url_v1 = f"{base_url}/v1/hme"
+    hme.base_url_v2 = f"{base_url}/v2/hme"
+    hme.validate_url = f"{base_url}/setup/ws/1/validate"
+
+
+def _quiet_rich_client():
+    from rich.console import Console
+    from main import RichHideMyEmail
+
+    return RichHideMyEmail(console=Console(file=io.StringIO()))
+
+
+async def bench_generate(args, options: ServerOptions) -> Dict[str, Any]:
+    from icloud import HideMyEmail
+
+    runner, _, base_url = await start_server(options)
+    try:
+        async with HideMyEmail() as hme:
+            _point_at(hme, base_url)
+
+            async def op():
+                res = await hme.generate_email()
+                return res.get("success")
+
+            return await measure("hme.generate_email", op, args.requests, args.concurrency, hme.transport)
+    finally:
+        await runner.cleanup()
+
+
+async def bench_generate_reserve(args, options: ServerOptions) -> Dict[str, Any]:
+    from icloud import HideMyEmail
+
+    runner, _, base_url = await start_server(options)
+    try:
+        async with HideMyEmail() as hme:
+            _point_at(hme, base_url)
+
+            async def op():
+                gen = await hme.generate_email()
+                if not gen.get("success"):
+                    return False
+                res = await hme.reserve_email(gen["result"]["hme"])
+                return res.get("success")
+
+            return await measure("hme.generate+reserve", op, args.requests, args.concurrency, hme.transport)
+    finally:
+        await runner.cleanup()
+
+
+async def bench_list(args, options: ServerOptions) -> Dict[str, Any]:
+    from icloud import HideMyEmail
+
+    runner, _, base_url = await start_server(options)
+    try:
+        async with HideMyEmail() as hme:
+            _point_at(hme, base_url)
+
+            async def op():
+                res = await hme.list_email()
+                return res.get("success")
+
+            return await measure(
+                f"hme.list_email[{options.list_size}]", op, args.list_requests, 1, hme.transport
+            )
+    finally:
+        await runner.cleanup()
+
+
+async def bench_list_revalidate(args, options: ServerOptions) -> Dict[str, Any]:
+    """Indeksni qayta sinxronlash: saqlangan ETag bilan shartli so'rov (304)"""
+    from config.settings import config
+    from icloud import AliasStore, HideMyEmail
+
+    runner, _, base_url = await start_server(options)
+    store = AliasStore(config.settings.alias_db_file)
+    try:
+        async with HideMyEmail() as hme:
+            _point_at(hme, base_url)
+            await hme.sync_store(store)
+
+            async def op():
+                stats = await hme.sync_store(store)
+                return stats.unchanged == options.list_size
+
+            return await measure(
+                f"hme.sync_store.304[{options.list_size}]", op, args.list_requests, 1, hme.transport
+            )
+    finally:
+        store.close()
+        await runner.cleanup()
+
+
+async def bench_iter_emails(args, options: ServerOptions) -> Dict[str, Any]:
+    from icloud import HideMyEmail
+
+    runner, _, base_url = await start_server(options)
+    try:
+        async with HideMyEmail() as hme:
+            _point_at(hme, base_url)
+
+            async def op():
+                count = 0
+                async for _ in hme.iter_emails():
+                    count += 1
+                return count == options.list_size
+
+            return await measure(
+                f"hme.iter_emails[{options.list_size}]", op, args.list_requests, 1, hme.transport
+            )
+    finally:
+        await runner.cleanup()
+
+
+async def bench_rich_generate_one(args, options: ServerOptions) -> Dict[str, Any]:
+    runner, _, base_url = await start_server(options)
+    try:
+        async with _quiet_rich_client() as hme:
+            _point_at(hme, base_url)
+
+            async def op():
+                return await hme._generate_one() is not None
+
+            return await measure("rich._generate_one", op, args.requests, args.concurrency, hme.transport)
+    finally:
+        await runner.cleanup()
+
+
+async def bench_rich_list_emails(args, options: ServerOptions) -> Dict[str, Any]:
+    runner, _, base_url = await start_server(options)
+    try:
+        async with _quiet_rich_client() as hme:
+            _point_at(hme, base_url)
+
+            async def op():
+                return bool(await hme.list_emails(active=None, refresh=True))
+
+            return await measure(
+                f"rich.list_emails[{options.list_size}]", op, args.list_requests, 1, hme.transport
+            )
+    finally:
+        await runner.cleanup()
+
+
+async def bench_rich_list_local(args, options: ServerOptions) -> Dict[str, Any]:
+    runner, _, base_url = await start_server(options)
+    try:
+        async with _quiet_rich_client() as hme:
+            _point_at(hme, base_url)
+            await hme.sync_aliases(force=True)
+
+            async def op():
+                return bool(await hme.list_emails(active=True, search="label 1"))
+
+            return await measure(
+                f"rich.list_emails.local[{options.list_size}]", op, args.list_requests, 1, hme.transport
+            )
+    finally:
+        await runner.cleanup()
+
+
+async def bench_codec(args, options: ServerOptions) -> List[Dict[str, Any]]:
+    """`list_email` javobini dekodlash: standart json (str/bytes) va `icloud.codec`"""
+    from icloud import codec
+
+    body = MockHideMyEmail(options).list_body()
+    decoders = {
+        "json.loads(str)": lambda: json.loads(body.decode("utf-8")),
+        "json.loads(bytes)": lambda: json.loads(body),
+        f"codec.{codec.BACKEND}": lambda: codec.decode_response(body, 200),
+    }
+    size_mb = len(body) / (1024 * 1024)
+    results = []
+    for label, decode in decoders.items():
+
+        async def op(decode=decode):
+            return len(decode()["result"]["hmeEmails"]) == options.list_size
+
+        result = await measure(f"{label}[{options.list_size}]", op, args.list_requests, 1)
+        result["mb_per_s"] = round(size_mb * result["rps"], 1)
+        results.append(result)
+    return results
+
+
+SCENARIOS = {
+    "generate": bench_generate,
+    "generate_reserve": bench_generate_reserve,
+    "list": bench_list,
+    "list_revalidate": bench_list_revalidate,
+    "iter_emails": bench_iter_emails,
+    "codec": bench_codec,
+    "rich_generate_one": bench_rich_generate_one,
+    "rich_list_emails": bench_rich_list_emails,
+    "rich_list_local": bench_rich_list_local,
+}
+
+
+def print_report(results: List[Dict[str, Any]]):
+    header = (f"{'ssenariy':<32}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'xato':>7}{'RSS MB':>9}"
+              f"{'ulanish yangi/qayta':>22}")
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        rss = "-" if r["peak_rss_mb"] is None else f"{r['peak_rss_mb']:.1f}"
+        conn = r.get("connections")
+        reuse = "-" if not conn else f"{conn['connections_created']}/{conn['connections_reused']}"
+        print(f"{r['name']:<32}{r['rps']:>10.1f}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['failures']:>7}{rss:>9}"
+              f"{reuse:>22}")
+
+
+def compare_with_baseline(results: List[Dict[str, Any]], baseline_path: Path, tolerance: float) -> List[str]:
+    """Baseline ga nisbatan `tolerance` dan ko'proq sekinlashgan yoki xotirasi o'sgan ssenariylar"""
+    baseline = {r["name"]: r for r in json.loads(baseline_path.read_text(encoding="utf-8"))["results"]}
+    regressions = []
+    for r in results:
+        old = baseline.get(r["name"])
+        if not old or not old["rps"]:
+            continue
+        if r["rps"] < old["rps"] * (1 - tolerance):
+            regressions.append(f"{r['name']}: {old['rps']:.1f} -> {r['rps']:.1f} req/s")
+        if old["p99_ms"] and r["p99_ms"] > old["p99_ms"] * (1 + tolerance):
+            regressions.append(f"{r['name']}: p99 {old['p99_ms']:.2f} -> {r['p99_ms']:.2f} ms")
+        old_rss, rss = old.get("peak_rss_mb"), r.get("peak_rss_mb")
+        if old_rss and rss is not None and rss > old_rss * (1 + tolerance):
+            regressions.append(f"{r['name']}: RSS {old_rss:.1f} -> {rss:.1f} MB")
+    return regressions
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="HideMyEmail benchmarklari")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Faqat tanlangan ssenariylar (bir necha marta berish mumkin)")
+    parser.add_argument("--requests", type=int, default=200, help="Generate/reserve so'rovlari soni")
+    parser.add_argument("--list-requests", type=int, default=5, help="Ro'yxat so'rovlari soni")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--list-size", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", type=Path, default=None, help="Natijalarni JSON faylga yozish")
+    parser.add_argument("--baseline", type=Path, default=None, help="Solishtirish uchun oldingi JSON natija")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Ruxsat etilgan sekinlashish ulushi")
+    parser.add_argument("--in-process", action="store_true",
+                        help="Barcha ssenariylarni bitta jarayonda bajarish (RSS jamlanadi)")
+    return parser.parse_args(argv)
+
+
+# Bola jarayonga uzatiladigan o'lchov parametrlari
+_CHILD_OPTIONS = ("requests", "list_requests", "concurrency", "latency", "jitter", "error_rate", "list_size", "seed")
+
+
+def run_isolated(args: argparse.Namespace, name: str) -> List[Dict[str, Any]]:
+    """Bitta ssenariyni yangi Python jarayonida bajaradi va uning natijalarini qaytaradi"""
+    with tempfile.TemporaryDirectory() as tmp:
+        output = Path(tmp) / "result.json"
+        cmd = [sys.executable, "-m", "bench.run", "--scenario", name, "--json", str(output)]
+        for option in _CHILD_OPTIONS:
+            cmd += [f"--{option.replace('_', '-')}", str(getattr(args, option))]
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, cwd=Path(__file__).resolve().parent.parent)
+        return json.loads(output.read_text(encoding="utf-8"))["results"]
+
+
+async def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    from config.settings import config
+
+    # Benchmark paytida qayta urinishlar orasida kutmaslik, vaqtinchalik indeks
+    workdir = Path(tempfile.mkdtemp())
+    config.override(
+        retry_delay=0,
+        alias_db_file=workdir / "aliases.db",
+    )
+
+    options = ServerOptions(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        list_size=args.list_size,
+        seed=args.seed,
+    )
+    results = []
+    for name in args.scenario or list(SCENARIOS):
+        result = await SCENARIOS[name](args, options)
+        # Ba'zi ssenariylar (codec) bir nechta variantni qatorma-qator qaytaradi
+        results.extend(result if isinstance(result, list) else [result])
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    names = args.scenario or list(SCENARIOS)
+    if args.in_process or len(names) == 1:
+        results = asyncio.run(run(args))
+    else:
+        results = [r for name in names for r in run_isolated(args, name)]
+    print_report(results)
+
+    if args.json:
+        params = {k: str(v) if isinstance(v, Path) else v for k, v in vars(args).items()}
+        args.json.write_text(
+            json.dumps({"created": int(time.time()), "args": params, "results": results}, indent=2),
+            encoding="utf-8",
+        )
+
+    if args.baseline:
+        regressions = compare_with_baseline(results, args.baseline, args.tolerance)
+        if regressions:
+            print("\nRegressiyalar:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
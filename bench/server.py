@@ -0,0 +1,350 @@
+"""Hide My Email API uchun mahalliy o'rinbosar server.
+
+Jonli iCloud akkauntisiz `HideMyEmail` ni o'lchash va sinash uchun
+`/v1/hme/generate`, `/v1/hme/reserve`, `/v2/hme/list`, boshqaruv
+(`updateMetaData`, `deactivate`, `reactivate`, `delete`) hamda sessiya
+tekshiruvi (`/setup/ws/1/validate`) endpointlarini taqlid qiladi.
+Kechikish, xatolik ulushi, limit javoblari, ro'yxat hajmi va sessiya
+muddatini sozlash mumkin.
+
+Ishga tushirish:
+    python -m bench.server --port 8080 --latency 0.05 --list-size 10000
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import string
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from email.utils import formatdate
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+QUOTA_ERROR_CODE = "-41015"
+QUOTA_ERROR_MESSAGE = "You have reached the limit of 5 per hour. Try again later."
+
+
+@dataclass
+class ServerOptions:
+    latency: float = 0.0          # O'rtacha javob kechikishi (soniyalarda)
+    jitter: float = 0.0           # Kechikishga qo'shiladigan tasodifiy qism (soniyalarda)
+    error_rate: float = 0.0       # 5xx javoblar ulushi (0..1)
+    rate_limit: float = 0.0       # Soniyasiga ruxsat etilgan so'rovlar (0 = cheklovsiz)
+    quota: int = 0                # Oynadagi zaxiralash limiti (0 = cheklovsiz)
+    window: float = 3600.0        # Limit oynasi uzunligi (soniyalarda)
+    list_size: int = 0            # Boshlang'ich ro'yxatdagi emaillar soni
+    seed: Optional[int] = None
+    conditional: bool = True      # /list uchun ETag/Last-Modified va 304 javoblari
+    session_ttl: float = 0.0      # Cookie qiymati shuncha soniyadan keyin 421 oladi (0 = cheklovsiz)
+
+
+class MockHideMyEmail:
+    """Hide My Email serverining xotiradagi holati va handlerlari"""
+
+    def __init__(self, options: ServerOptions):
+        self.options = options
+        self.random = random.Random(options.seed)
+        self.aliases: List[Dict[str, Any]] = []
+        self.generated: set = set()
+        self.reservations: Deque[float] = deque()
+        self.request_times: Deque[float] = deque()
+        self.stats: Dict[str, int] = {}
+        self.sessions: Dict[str, float] = {}
+        self._list_body: Optional[bytes] = None
+        self._list_etag = ""
+        self._modified_at = time.time()
+
+        now_ms = int(time.time() * 1000)
+        for idx in range(options.list_size):
+            self.aliases.append(self._make_alias(
+                self._random_hme(),
+                label=f"label {idx % 97}",
+                create_ts=now_ms - idx * 60_000,
+                active=idx % 10 != 0,
+            ))
+
+    def _random_hme(self) -> str:
+        name = "".join(self.random.choices(string.ascii_lowercase + string.digits, k=12))
+        return f"{name}@icloud.com"
+
+    def _make_alias(self, hme: str, label: str, create_ts: int, active: bool = True, note: str = "") -> Dict[str, Any]:
+        return {
+            "origin": "ON_DEMAND",
+            "anonymousId": uuid.UUID(int=self.random.getrandbits(128)).hex,
+            "domain": "",
+            "forwardToEmail": "owner@example.com",
+            "hme": hme,
+            "label": label,
+            "note": note,
+            "createTimestamp": create_ts,
+            "isActive": active,
+            "recipientMailId": "",
+        }
+
+    def _count(self, key: str):
+        self.stats[key] = self.stats.get(key, 0) + 1
+
+    @staticmethod
+    def _json(payload: Dict[str, Any], status: int = 200) -> web.Response:
+        return web.Response(body=json.dumps(payload).encode(), status=status, content_type="application/json")
+
+    @staticmethod
+    def _error(code: str, message: str, status: int = 200) -> web.Response:
+        return MockHideMyEmail._json(
+            {"success": False, "timestamp": int(time.time()), "error": {"errorCode": code, "errorMessage": message}},
+            status=status,
+        )
+
+    def _session_expired(self, request: web.Request) -> bool:
+        """Har bir `Cookie` qiymati birinchi ko'rilgandan `session_ttl` soniya yashaydi"""
+        if self.options.session_ttl <= 0:
+            return False
+        first_seen = self.sessions.setdefault(request.headers.get("Cookie", ""), time.time())
+        return time.time() - first_seen >= self.options.session_ttl
+
+    async def _simulate(self, request: web.Request) -> Optional[web.Response]:
+        """Kechikish, sessiya muddati, rate-limit va tasodifiy 5xx xatolarni qo'llaydi"""
+        opts = self.options
+        delay = opts.latency + (self.random.uniform(0, opts.jitter) if opts.jitter else 0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if self._session_expired(request):
+            self._count("unauthorized")
+            return self._error("UNAUTHORIZED", "Session expired", status=421)
+
+        if opts.rate_limit > 0:
+            now = time.monotonic()
+            while self.request_times and now - self.request_times[0] > 1.0:
+                self.request_times.popleft()
+            if len(self.request_times) >= opts.rate_limit:
+                self._count("rate_limited")
+                resp = self._error("RATE_LIMITED", "Too many requests", status=429)
+                resp.headers["Retry-After"] = "1"
+                return resp
+            self.request_times.append(now)
+
+        if opts.error_rate > 0 and self.random.random() < opts.error_rate:
+            self._count("server_error")
+            return self._error("SERVICE_UNAVAILABLE", "Service temporarily unavailable", status=503)
+        return None
+
+    def _quota_exceeded(self) -> bool:
+        if self.options.quota <= 0:
+            return False
+        now = time.time()
+        while self.reservations and now - self.reservations[0] >= self.options.window:
+            self.reservations.popleft()
+        return len(self.reservations) >= self.options.quota
+
+    async def validate(self, request: web.Request) -> web.Response:
+        """`setup.icloud.com/setup/ws/1/validate` kabi: `success` maydonisiz, `dsInfo` bilan"""
+        self._count("validate")
+        failure = await self._simulate(request)
+        if failure is not None:
+            return failure
+        return self._json({"dsInfo": {"dsid": "1000000000", "fullName": "Bench User"}, "hasMinimumDeviceForPhotosWeb": True})
+
+    async def generate(self, request: web.Request) -> web.Response:
+        self._count("generate")
+        failure = await self._simulate(request)
+        if failure is not None:
+            return failure
+        hme = self._random_hme()
+        self.generated.add(hme)
+        return self._json({"success": True, "timestamp": int(time.time()), "result": {"hme": hme}})
+
+    async def reserve(self, request: web.Request) -> web.Response:
+        self._count("reserve")
+        failure = await self._simulate(request)
+        if failure is not None:
+            return failure
+        try:
+            payload = json.loads(await request.read())
+        except ValueError:
+            return self._error("INVALID_PAYLOAD", "Invalid payload", status=400)
+
+        hme = payload.get("hme")
+        if hme not in self.generated:
+            return self._error("-41001", "Unknown or already reserved address")
+        if self._quota_exceeded():
+            self._count("quota")
+            return self._error(QUOTA_ERROR_CODE, QUOTA_ERROR_MESSAGE)
+
+        self.generated.discard(hme)
+        self.reservations.append(time.time())
+        alias = self._make_alias(
+            hme,
+            label=payload.get("label", ""),
+            create_ts=int(time.time() * 1000),
+            note=payload.get("note", ""),
+        )
+        self.aliases.insert(0, alias)
+        self._changed()
+        return self._json({"success": True, "timestamp": int(time.time()), "result": {"hme": alias}})
+
+    def list_body(self) -> bytes:
+        """/list javobi tanasi; ro'yxat o'zgarmaguncha bir marta seriyalanadi"""
+        if self._list_body is None:
+            self._list_body = json.dumps({
+                "success": True,
+                "timestamp": int(time.time()),
+                "result": {
+                    "forwardToEmails": ["owner@example.com"],
+                    "hmeEmails": self.aliases,
+                    "selectedForwardTo": "owner@example.com",
+                },
+            }).encode()
+            self._list_etag = f'"{hashlib.sha1(self._list_body).hexdigest()[:20]}"'
+        return self._list_body
+
+    async def list(self, request: web.Request) -> web.Response:
+        self._count("list")
+        failure = await self._simulate(request)
+        if failure is not None:
+            return failure
+        self.list_body()
+        if not self.options.conditional:
+            return web.Response(body=self._list_body, content_type="application/json")
+
+        headers = {"ETag": self._list_etag, "Last-Modified": formatdate(self._modified_at, usegmt=True)}
+        if_none_match = request.headers.get("If-None-Match")
+        if_modified_since = request.headers.get("If-Modified-Since")
+        not_modified = (
+            if_none_match == self._list_etag if if_none_match is not None
+            else if_modified_since is not None and if_modified_since == headers["Last-Modified"]
+        )
+        if not_modified:
+            self._count("not_modified")
+            return web.Response(status=304, headers=headers)
+        return web.Response(body=self._list_body, content_type="application/json", headers=headers)
+
+    async def _manage(self, request: web.Request, name: str):
+        """Boshqaruv so'rovlari uchun umumiy qism: (alias, payload) yoki xato javobi"""
+        self._count(name)
+        failure = await self._simulate(request)
+        if failure is not None:
+            return None, None, failure
+        try:
+            payload = json.loads(await request.read())
+        except ValueError:
+            return None, None, self._error("INVALID_PAYLOAD", "Invalid payload", status=400)
+        anonymous_id = payload.get("anonymousId")
+        for alias in self.aliases:
+            if alias["anonymousId"] == anonymous_id:
+                return alias, payload, None
+        return None, None, self._error("-41006", "Unknown anonymousId")
+
+    def _changed(self):
+        self._list_body = None
+        self._modified_at = time.time()
+
+    def _ok(self, result: Optional[Dict[str, Any]] = None) -> web.Response:
+        self._changed()
+        return self._json({"success": True, "timestamp": int(time.time()), "result": result or {}})
+
+    async def update_metadata(self, request: web.Request) -> web.Response:
+        alias, payload, failure = await self._manage(request, "updateMetaData")
+        if failure is not None:
+            return failure
+        alias["label"] = payload.get("label", alias["label"])
+        alias["note"] = payload.get("note", alias["note"])
+        return self._ok()
+
+    async def deactivate(self, request: web.Request) -> web.Response:
+        alias, _, failure = await self._manage(request, "deactivate")
+        if failure is not None:
+            return failure
+        alias["isActive"] = False
+        return self._ok()
+
+    async def reactivate(self, request: web.Request) -> web.Response:
+        alias, _, failure = await self._manage(request, "reactivate")
+        if failure is not None:
+            return failure
+        alias["isActive"] = True
+        return self._ok()
+
+    async def delete(self, request: web.Request) -> web.Response:
+        alias, _, failure = await self._manage(request, "delete")
+        if failure is not None:
+            return failure
+        if alias["isActive"]:
+            return self._error("-41007", "Address must be deactivated before deletion")
+        self.aliases.remove(alias)
+        return self._ok()
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/setup/ws/1/validate", self.validate)
+        app.router.add_post("/v1/hme/generate", self.generate)
+        app.router.add_post("/v1/hme/reserve", self.reserve)
+        app.router.add_get("/v2/hme/list", self.list)
+        app.router.add_post("/v1/hme/updateMetaData", self.update_metadata)
+        app.router.add_post("/v1/hme/deactivate", self.deactivate)
+        app.router.add_post("/v1/hme/reactivate", self.reactivate)
+        app.router.add_post("/v1/hme/delete", self.delete)
+        return app
+
+
+async def start_server(
+    options: ServerOptions, host: str = "127.0.0.1", port: int = 0
+) -> Tuple[web.AppRunner, MockHideMyEmail, str]:
+    """Serverni fon rejimida ishga tushiradi va (runner, holat, base_url) qaytaradi"""
+    mock = MockHideMyEmail(options)
+    runner = web.AppRunner(mock.make_app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return runner, mock, f"http://{host}:{bound_port}"
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Hide My Email o'rinbosar serveri")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="O'rtacha kechikish (soniya)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Tasodifiy qo'shimcha kechikish (soniya)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="5xx javoblar ulushi (0..1)")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Soniyasiga so'rovlar limiti (429)")
+    parser.add_argument("--quota", type=int, default=0, help="Oynadagi zaxiralash limiti")
+    parser.add_argument("--window", type=float, default=3600.0, help="Limit oynasi (soniya)")
+    parser.add_argument("--list-size", type=int, default=0, help="Boshlang'ich emaillar soni")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--no-conditional", dest="conditional", action="store_false",
+                        help="/list uchun ETag/Last-Modified bermaslik")
+    parser.add_argument("--session-ttl", type=float, default=0.0,
+                        help="Har bir cookie shuncha soniyadan keyin eskiradi (421)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    options = ServerOptions(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        quota=args.quota,
+        window=args.window,
+        list_size=args.list_size,
+        seed=args.seed,
+        conditional=args.conditional,
+        session_ttl=args.session_ttl,
+    )
+    mock = MockHideMyEmail(options)
+    print(f"base_url_v1 = http://{args.host}:{args.port}/v1/hme")
+    print(f"base_url_v2 = http://{args.host}:{args.port}/v2/hme")
+    print(f"validate_url = http://{args.host}:{args.port}/setup/ws/1/validate")
+    web.run_app(mock.make_app(), host=args.host, port=args.port, print=None, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,430 @@
 #!/usr/bin/env python3
+"""iCloud Yashirin Email Generator CLI (interaktiv menyusiz, avtomatlashtirish uchun).
+
+Natijalar stdout ga JSON ko'rinishida, holat xabarlari stderr ga chiqadi.
+Og'ir kutubxonalar (aiohttp, rich) faqat kerakli buyruq ichida yuklanadi.
+
+Chiqish kodlari:
+    0  muvaffaqiyatli
+    1  xato
+    2  noto'g'ri argumentlar (click)
+    3  avtorizatsiya xatosi (cookie eskirgan)
+    4  qisman bajarildi (so'ralgan sondan kam email zaxiralandi)
+"""
 
 import asyncio
+import json
+import re
+import signal
+import sys
+from typing import Any, Optional
+
 import click
 
-from main import main as main_async
-from icloud import HideMyEmail
-from utils.logger import logger
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_AUTH = 3
+EXIT_PARTIAL = 4
+
+
+def _emit(payload: Any):
+    json.dump(payload, sys.stdout, ensure_ascii=False)
+    sys.stdout.write("\n")
+
+
+def _fail(reason: str, code: int = EXIT_ERROR, **fields: Any):
+    json.dump({"error": reason, **fields}, sys.stderr, ensure_ascii=False)
+    sys.stderr.write("\n")
+    sys.exit(code)
+
+
+def _active_filter(state: str) -> Optional[bool]:
+    return {"active": True, "inactive": False, "all": None}[state]
+
+
+async def _sync_store(store, refresh: bool, offline: bool):
+    from config.settings import config
+
+    if offline:
+        return
+    if not (refresh or store.is_stale(config.settings.alias_sync_ttl)):
+        from utils.metrics import record_list_sync
+
+        record_list_sync("hit")
+        return
+    from icloud.cookies import read_cookie_file
+    from icloud.errors import ErrorKind, HideMyEmailError
+    from icloud.hidemyemail import HideMyEmail
+
+    async with HideMyEmail(read_cookie_file(config.settings.cookie_file)) as hme:
+        try:
+            await hme.sync_store(store)
+        except HideMyEmailError as e:
+            code = EXIT_AUTH if e.kind is ErrorKind.AUTH else EXIT_ERROR
+            _fail(e.reason, code, status=e.status, errorCode=e.code)
+
+
+def _open_store(refresh: bool, offline: bool):
+    """Mahalliy indeksni ochadi va kerak bo'lsa serverdan yangilaydi"""
+    from config.settings import config
+    from icloud.store import AliasStore
+
+    store = AliasStore(config.settings.alias_db_file)
+    try:
+        asyncio.run(_sync_store(store, refresh, offline))
+    except BaseException:
+        store.close()
+        raise
+    return store
+
+
+def _check_search(ctx, param, value: Optional[str]) -> Optional[str]:
+    """--search regex ini oldindan kompilyatsiya qilib tekshiradi"""
+    if value:
+        from icloud.store import compile_search
+
+        try:
+            compile_search(value)
+        except re.error as e:
+            raise click.BadParameter(f"noto'g'ri regex: {e}")
+    return value
+
+
+def with_filters(func=None, *, state: str = "active"):
+    """Umumiy tanlash parametrlari: --state, --search, --refresh, --offline"""
+    options = [
+        click.option("--state", type=click.Choice(["active", "inactive", "all"]), default=state,
+                     show_default=True, help="Qaysi emaillar"),
+        click.option("--search", default=None, callback=_check_search, help="Yorliq bo'yicha qidiruv (regex)"),
+        click.option("--refresh", is_flag=True, help="Avval serverdan yangilash"),
+        click.option("--offline", is_flag=True, help="Faqat mahalliy indeksdan o'qish"),
+    ]
+
+    def decorate(func):
+        for option in reversed(options):
+            func = option(func)
+        return func
+
+    return decorate(func) if func is not None else decorate
+
 
 @click.group()
-def cli():
+@click.option("--profile", is_flag=True, help="Profilash; hisobot dastur tugaganda stderr ga chiqadi")
+@click.option("--profile-mode", type=click.Choice(["cprofile", "sample"]), default="cprofile", show_default=True,
+              help="cprofile - aniq, sample - yengil stek namunalari")
+def cli(profile: bool, profile_mode: str):
     """iCloud Yashirin Email Generator CLI"""
-    pass
+    if profile:
+        from config.settings import config
+        from utils import profiling
+
+        profiling.enable(profile_mode, config.settings.profile_dir)
+
 
 @cli.command()
 @click.option("--count", default=5, help="Generatsiya qilinadigan email soni", type=int)
 @click.option("--batch", default=5, help="Har bir partiyadagi email soni", type=int)
-def generate(count: int, batch: int):
+@click.option("--resume", is_flag=True, help="Tugallanmagan jarayonni davom ettirish")
+def generate(count: int, batch: int, resume: bool):
     """Email generatsiya qilish"""
-    asyncio.run(main_async.generate_with_schedule(count, batch))
+
+    async def run() -> int:
+        from rich.console import Console
+        from main import RichHideMyEmail
+
+        async with RichHideMyEmail(console=Console(stderr=True)) as hme:
+            emails = await hme.generate_with_schedule(count, batch, resume=resume)
+            pending = hme.scheduler.pending_run()
+            _emit({"reserved": emails, "count": len(emails), "pending": pending})
+            if hme.auth_failed:
+                return EXIT_AUTH
+            return EXIT_PARTIAL if pending else EXIT_OK
+
+    sys.exit(asyncio.run(run()))
+
+
+@cli.command("list")
+@with_filters
+@click.option("--format", "fmt", type=click.Choice(["json", "ndjson", "table"]), default="json",
+              show_default=True, help="Chiqish formati (ndjson - qatorlar kelishi bilan)")
+@click.option("--page-size", type=click.IntRange(min=1), default=None,
+              help="Jadval sahifasidagi qatorlar soni (standart: config.ini dagi page_size)")
+def list_(state: str, search: Optional[str], refresh: bool, offline: bool, fmt: str, page_size: Optional[int]):
+    """Email ro'yxatini chiqarish"""
+    from config.settings import config
+    from utils.render import make_renderer
+
+    store = _open_store(refresh, offline)
+    try:
+        renderer = make_renderer(fmt, sys.stdout, page_size=page_size or config.settings.page_size)
+        for row in store.query(_active_filter(state), search):
+            renderer.add(row)
+        renderer.close()
+    finally:
+        store.close()
+
+
+@cli.command()
+@click.argument("output", type=click.Path(dir_okay=False, writable=True))
+@click.option("--format", "fmt", type=click.Choice(["csv", "ndjson", "json"]), default=None,
+              help="Fayl formati (standart: kengaytmadan, aks holda csv)")
+@click.option("--compress", type=click.Choice(["auto", "none", "gzip", "zstd"]), default="auto",
+              show_default=True, help="Siqish (auto - .gz/.zst kengaytmasidan)")
+@click.option("--columns", default=None, help="Ustunlar ro'yxati, masalan: hme,label,created")
+@with_filters
+def export(output: str, fmt: Optional[str], compress: str, columns: Optional[str],
+           state: str, search: Optional[str], refresh: bool, offline: bool):
+    """Email ro'yxatini faylga eksport qilish"""
+    from utils.export import Exporter
+
+    try:
+        exporter = Exporter(output, fmt=fmt, columns=columns,
+                            compression=None if compress == "none" else compress)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+    store = _open_store(refresh, offline)
+    try:
+        with exporter:
+            for row in store.query(_active_filter(state), search):
+                exporter.write(row)
+    except OSError as e:
+        _fail(str(e))
+    finally:
+        store.close()
+    _emit({"path": output, "count": exporter.count, "format": exporter.fmt,
+           "compression": exporter.compression, "columns": list(exporter.columns)})
+
 
 @cli.command()
-@click.option("--active/--inactive", default=True, help="Faol/nofaol emaillarni ko'rsatish")
-@click.option("--search", default=None, help="Qidiruv uchun kalit so'z")
-@click.option("--save", is_flag=True, help="Natijalarni CSV fayliga saqlash")
-def list(active: bool, search: str, save: bool):
-    """Email ro'yxatini ko'rsatish"""
-    asyncio.run(main_async.list_emails(active, search, save))
+@click.argument("action", type=click.Choice(["relabel", "deactivate", "reactivate", "delete"]))
+@with_filters(state="all")
+@click.option("--label", default=None, help="Yangi yorliq (relabel uchun majburiy)")
+@click.option("--note", default=None, help="Yangi izoh (relabel uchun, berilmasa o'zgarmaydi)")
+@click.option("--dry-run", is_flag=True, help="Faqat tanlangan emaillarni ko'rsatish, hech narsa yubormaslik")
+def bulk(action: str, state: str, search: Optional[str], refresh: bool, offline: bool,
+         label: Optional[str], note: Optional[str], dry_run: bool):
+    """Filtrga mos emaillarga ommaviy amal qo'llash"""
+    if action == "relabel" and label is None:
+        raise click.BadParameter("relabel uchun --label kerak", param_hint="--label")
+
+    if dry_run:
+        store = _open_store(refresh, offline)
+        try:
+            selected = [row.hme for row in store.query(_active_filter(state), search)]
+        finally:
+            store.close()
+        _emit({"action": action, "count": len(selected), "selected": selected})
+        return
+
+    async def run() -> int:
+        from rich.console import Console
+        from main import RichHideMyEmail
+
+        async with RichHideMyEmail(console=Console(stderr=True)) as hme:
+            result = await hme.bulk_update(
+                action, _active_filter(state), search, label=label, note=note, refresh=refresh, offline=offline
+            )
+            if result is None:
+                _emit({"action": action, "total": 0, "ok": 0, "skipped": 0, "failed": 0, "report": None})
+                return EXIT_OK
+            _emit({"action": action, **result})
+            if hme.auth_failed:
+                return EXIT_AUTH
+            return EXIT_PARTIAL if result["failed"] else EXIT_OK
+
+    sys.exit(asyncio.run(run()))
+
+
+@cli.group()
+def archive():
+    """Barcha zaxiralardan yig'ilgan takrorsiz email arxivi"""
+    pass
+
+
+@archive.command("compact")
+@click.option("--prune-days", type=float, default=None,
+              help="Arxivga o'tkazilgan va shuncha kundan eski .bak fayllarni o'chirish")
+def archive_compact(prune_days: Optional[float]):
+    """.bak zaxiralar, generated_emails.txt va jurnalni arxivga birlashtirish"""
+    from config.settings import config
+    from utils.archive import AliasArchive
+
+    store = AliasArchive(config.settings.archive_file)
+    try:
+        stats = store.compact(
+            config.settings.backup_dir,
+            emails_file=config.settings.generated_emails_file,
+            journal_file=config.settings.journal_file,
+            prune_days=prune_days,
+        )
+        _emit({**stats.as_dict(), "total": len(store)})
+    except OSError as e:
+        _fail(str(e))
+    finally:
+        store.close()
+
+
+@archive.command("check")
+@click.argument("emails", nargs=-1, required=True)
+def archive_check(emails):
+    """Emaillar arxivda bormi (bittasi ham yo'q bo'lsa chiqish kodi 1)"""
+    from config.settings import config
+    from utils.archive import AliasArchive
+
+    store = AliasArchive(config.settings.archive_file)
+    try:
+        found = {email: email in store for email in emails}
+    finally:
+        store.close()
+    _emit(found)
+    sys.exit(EXIT_OK if all(found.values()) else EXIT_ERROR)
+
+
+@archive.command("reconcile")
+@click.option("--refresh", is_flag=True, help="Avval serverdan yangilash")
+@click.option("--offline", is_flag=True, help="Faqat mahalliy indeksdan o'qish")
+@click.option("--adopt", is_flag=True, help="Serverda bor-u arxivda yo'q emaillarni arxivga qo'shish")
+def archive_reconcile(refresh: bool, offline: bool, adopt: bool):
+    """Arxivni serverdagi ro'yxat bilan solishtirish"""
+    from config.settings import config
+    from utils.archive import AliasArchive
+
+    store = _open_store(refresh, offline)
+    archive_store = AliasArchive(config.settings.archive_file)
+    try:
+        report = archive_store.reconcile(store.query(), adopt=adopt)
+    finally:
+        archive_store.close()
+        store.close()
+    _emit(report.as_dict())
+
+
+@cli.group()
+def pool():
+    """Oldindan zaxiralangan emaillar puli (demon va API)"""
+    pass
+
+
+@pool.command("serve")
+@click.option("--socket", "socket_path", default=None, help="Unix socket yo'li (standart: config.ini dagi pool_socket)")
+@click.option("--host", default=None, help="TCP manzil (standart: pool_host)")
+@click.option("--port", default=None, type=int, help="TCP port (standart: pool_port)")
+def pool_serve(socket_path: Optional[str], host: Optional[str], port: Optional[int]):
+    """Pulni fonda to'ldirib turish va POST /alias orqali berish (Ctrl+C gacha)"""
+    from config.settings import config
+    from icloud.pool import AliasPool, PoolServer
+
+    settings = config.settings
+    store = AliasPool(settings.pool_file)
+    server = PoolServer(
+        store,
+        socket_path=socket_path or settings.pool_socket or None,
+        host=host or settings.pool_host,
+        port=port or settings.pool_port,
+    )
+
+    async def run():
+        from rich.console import Console
+        from main import RichHideMyEmail
+
+        task = asyncio.current_task()
+        try:
+            # systemd/docker to'xtatganda ham socket va jurnal to'g'ri yopilsin
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, task.cancel)
+        except (NotImplementedError, AttributeError):
+            pass  # Windows
+        async with RichHideMyEmail(console=Console(stderr=True)) as hme:
+            return await hme.serve_pool(store, server)
+
+    ok = True
+    try:
+        ok = asyncio.run(run())
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    finally:
+        store.close()
+    if not ok:
+        sys.exit(EXIT_ERROR)
+
+
+@pool.command("take")
+@click.option("--assignee", default=None, help="Email kimga berilgani (hisob uchun)")
+def pool_take(assignee: Optional[str]):
+    """Puldan bitta emailni demonsiz, to'g'ridan-to'g'ri bazadan olish"""
+    from config.settings import config
+    from icloud.pool import AliasPool
+
+    store = AliasPool(config.settings.pool_file)
+    try:
+        alias = store.take(assignee)
+    finally:
+        store.close()
+    if alias is None:
+        _fail("Pul bo'sh")
+    _emit(alias)
+
+
+@pool.command("status")
+def pool_status():
+    """Puldagi bo'sh va berilgan emaillar soni"""
+    from config.settings import config
+    from icloud.pool import AliasPool
+
+    store = AliasPool(config.settings.pool_file)
+    try:
+        _emit(store.counts())
+    finally:
+        store.close()
+
+
+@cli.command()
+def preflight():
+    """Cookie va sessiyani tekshirish (email yaratmaydi); yaroqsiz bo'lsa chiqish kodi 3"""
+    from config.settings import config
+    from icloud.cookies import load_cookie_jar
+
+    jar = load_cookie_jar(config.settings.cookie_file)
+    expires_in = jar.expires_in()
+    report = {
+        "cookies": len(jar),
+        "missing": jar.missing,
+        "expires_at": jar.expires_at,
+        "expires_in": round(expires_in) if expires_in is not None else None,
+    }
+    if not jar:
+        _fail("Cookie topilmadi", EXIT_AUTH, **report)
+    if expires_in is not None and expires_in <= 0:
+        _fail("Cookie eskirgan", EXIT_AUTH, **report)
+
+    async def run():
+        from icloud.errors import classify, error_message
+        from icloud.hidemyemail import HideMyEmail
+
+        async with HideMyEmail(jar.header()) as hme:
+            res = await hme.validate_session()
+        return res, classify(res), error_message(res)
+
+    res, kind, message = asyncio.run(run())
+    if kind is not None:
+        from icloud.errors import ErrorKind
+
+        _fail(message, EXIT_AUTH if kind is ErrorKind.AUTH else EXIT_ERROR, kind=kind.value, **report)
+    _emit({"valid": True, **report})
+
+
+@cli.command()
+def resume():
+    """generated_emails.txt faylini zaxiralar jurnalidan tiklash"""
+    from config.settings import config
+    from utils.journal import ReservationJournal
+
+    target = config.settings.generated_emails_file
+    try:
+        count = ReservationJournal.rebuild(config.settings.journal_file, target)
+    except OSError as e:
+        _fail(str(e))
+    _emit({"path": target, "count": count})
+
 
 if __name__ == "__main__":
     cli()
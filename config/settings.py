@@ -1,48 +1,267 @@
 import configparser
+import os
+import time
 from pathlib import Path
-from typing import Dict, Any
+from typing import Any, Callable, Dict, Optional, Tuple
+
+DEFAULTS = {
+    "max_concurrent_tasks": "5",
+    "delay_hours": "1",
+    "time_between_accounts": "5",
+    "max_retries": "3",
+    "retry_delay": "2",
+    "retry_max_delay": "60",
+    "retry_jitter": "0.5",
+    "cookie_file": "cookie.txt",
+    "generated_emails_file": "generated_emails.txt",
+    "backup_dir": "backups",
+    "journal_file": "reserved_journal.jsonl",
+    "journal_fsync_interval": "1",
+    "timezone": "Europe/Moscow",
+    "label": "rtuna's gen",
+    "base_url_v1": "https://p68-maildomainws.icloud.com/v1/hme",
+    "base_url_v2": "https://p68-maildomainws.icloud.com/v2/hme",
+    "validate_url": "https://setup.icloud.com/setup/ws/1/validate",
+    "cookie_expiry_margin": "900",
+    "pool_size": "10",
+    "dns_cache_ttl": "300",
+    "keepalive_timeout": "30",
+    "connect_timeout": "10",
+    "read_timeout": "10",
+    "request_timeout": "60",
+    "alias_db_file": "aliases.db",
+    "alias_sync_ttl": "300",
+    "page_size": "50",
+    "export_format": "csv",
+    "export_compression": "",
+    "export_columns": "",
+    "bulk_concurrency": "5",
+    "report_dir": "reports",
+    "archive_file": "archive.db",
+    "pool_file": "pool.db",
+    "pool_low": "10",
+    "pool_high": "25",
+    "pool_socket": "",
+    "pool_host": "127.0.0.1",
+    "pool_port": "8765",
+    "quota_per_window": "5",
+    "schedule_state_file": "schedule_state.json",
+    "metrics_file": "",
+    "metrics_port": "0",
+    "metrics_host": "127.0.0.1",
+    "metrics_interval": "15",
+    "profile_dir": "profiles",
+}
+
+# Muhit o'zgaruvchilari orqali qayta belgilash: HME_MAX_RETRIES=5 va h.k.
+ENV_PREFIX = "HME_"
+
+
+def _positive(value) -> bool:
+    return value > 0
+
+
+def _non_negative(value) -> bool:
+    return value >= 0
+
+
+# Kalit -> (tur, tekshiruv, xato matni); ro'yxatda yo'q kalitlar - satr
+SCHEMA: Dict[str, Tuple[type, Optional[Callable[[Any], bool]], str]] = {
+    "max_concurrent_tasks": (int, _positive, "musbat bo'lishi kerak"),
+    "delay_hours": (float, _positive, "musbat bo'lishi kerak"),
+    "time_between_accounts": (float, _non_negative, "manfiy bo'lmasligi kerak"),
+    "max_retries": (int, _non_negative, "manfiy bo'lmasligi kerak"),
+    "retry_delay": (float, _non_negative, "manfiy bo'lmasligi kerak"),
+    "retry_max_delay": (float, _non_negative, "manfiy bo'lmasligi kerak"),
+    "retry_jitter": (float, lambda v: 0 <= v <= 1, "0 va 1 orasida bo'lishi kerak"),
+    "journal_fsync_interval": (float, _non_negative, "manfiy bo'lmasligi kerak"),
+    "cookie_expiry_margin": (float, _non_negative, "manfiy bo'lmasligi kerak"),
+    "pool_size": (int, _non_negative, "manfiy bo'lmasligi kerak"),
+    "dns_cache_ttl": (int, _non_negative, "manfiy bo'lmasligi kerak"),
+    "keepalive_timeout": (float, _non_negative, "manfiy bo'lmasligi kerak"),
+    "connect_timeout": (float, _non_negative, "manfiy bo'lmasligi kerak"),
+    "read_timeout": (float, _non_negative, "manfiy bo'lmasligi kerak"),
+    "request_timeout": (float, _non_negative, "manfiy bo'lmasligi kerak"),
+    "alias_sync_ttl": (float, _non_negative, "manfiy bo'lmasligi kerak"),
+    "page_size": (int, _positive, "musbat bo'lishi kerak"),
+    "export_format": (str, lambda v: v in ("csv", "ndjson", "json"), "csv, ndjson yoki json bo'lishi kerak"),
+    "export_compression": (str, lambda v: v in ("", "gzip", "zstd"), "bo'sh, gzip yoki zstd bo'lishi kerak"),
+    "bulk_concurrency": (int, _positive, "musbat bo'lishi kerak"),
+    "pool_low": (int, _positive, "musbat bo'lishi kerak"),
+    "pool_high": (int, _positive, "musbat bo'lishi kerak"),
+    "pool_port": (int, lambda v: 0 < v <= 65535, "1..65535 oralig'ida bo'lishi kerak"),
+    "quota_per_window": (int, _positive, "musbat bo'lishi kerak"),
+    "metrics_port": (int, lambda v: 0 <= v <= 65535, "0..65535 oralig'ida bo'lishi kerak"),
+    "metrics_interval": (float, _positive, "musbat bo'lishi kerak"),
+}
+
+# Ishlayotgan jarayonda qayta yuklanganda darhol kuchga kiradigan kalitlar;
+# qolganlari (fayl yo'llari, ulanish puli, URL lar) keyingi ishga tushirishda
+RELOADABLE = frozenset({
+    "max_concurrent_tasks", "delay_hours", "time_between_accounts", "max_retries",
+    "retry_delay", "retry_max_delay", "retry_jitter", "quota_per_window",
+    "bulk_concurrency", "label", "alias_sync_ttl", "page_size", "pool_low", "pool_high",
+    "cookie_expiry_margin",
+})
+
+_BOOLEANS = configparser.ConfigParser.BOOLEAN_STATES
+
+
+class SettingsError(ValueError):
+    """config.ini yoki muhit o'zgaruvchilaridagi noto'g'ri qiymatlar"""
+
+
+class Settings:
+    """Tekshirilgan, o'zgarmas sozlamalar nusxasi.
+
+    Qiymatlar bir marta tur bo'yicha o'giriladi, shuning uchun issiq
+    tsikllarda `config.settings.max_retries` oddiy atribut o'qishdir.
+    """
+
+    __slots__ = tuple(DEFAULTS)
+
+    def __init__(self, values: Dict[str, str]):
+        errors = []
+        for key in self.__slots__:
+            raw = values.get(key, DEFAULTS[key]).strip()
+            kind, check, message = SCHEMA.get(key, (str, None, ""))
+            try:
+                if kind is bool:
+                    if raw.lower() not in _BOOLEANS:
+                        raise ValueError(raw)
+                    value = _BOOLEANS[raw.lower()]
+                else:
+                    value = kind(raw)
+            except ValueError:
+                errors.append(f"{key} = {raw!r}: {kind.__name__} bo'lishi kerak")
+                continue
+            if check is not None and not check(value):
+                errors.append(f"{key} = {raw!r}: {message}")
+                continue
+            object.__setattr__(self, key, value)
+        if errors:
+            raise SettingsError("Noto'g'ri sozlamalar: " + "; ".join(errors))
+
+    def __setattr__(self, key: str, value: Any):
+        raise AttributeError("Settings o'zgarmas: config.ini, HME_* yoki config.override() dan foydalaning")
+
+    def __delattr__(self, key: str):
+        raise AttributeError("Settings o'zgarmas")
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    def diff(self, other: "Settings") -> Dict[str, Tuple[Any, Any]]:
+        """O'zgargan kalitlar: {kalit: (eski, yangi)}"""
+        return {
+            key: (getattr(self, key), getattr(other, key))
+            for key in self.__slots__
+            if getattr(self, key) != getattr(other, key)
+        }
+
+    def __repr__(self) -> str:
+        return f"Settings({', '.join(f'{key}={getattr(self, key)!r}' for key in self.__slots__)})"
+
 
 class Config:
-    def __init__(self):
-        self.config = configparser.ConfigParser()
-        self.config_file = Path("config.ini")
-        
+    # config.ini o'zgargach qayta o'qishdan oldin kutiladigan vaqt (soniyalarda)
+    RELOAD_SETTLE = 1.0
+
+    def __init__(self, config_file: str = "config.ini"):
+        self.config_file = Path(config_file)
+        self._overrides: Dict[str, str] = {}
+        self._mtime: Optional[float] = None
+        self.config = self._read()
+        self.settings = Settings(dict(self.config["DEFAULT"]))
+
+    def _stat(self) -> Optional[float]:
+        try:
+            return self.config_file.stat().st_mtime
+        except OSError:
+            return None
+
+    def _read(self) -> configparser.ConfigParser:
+        """Standart qiymatlar < config.ini < HME_* muhit o'zgaruvchilari < override()"""
+        # config.example.ini dagi qator oxiri izohlari ("5  # ...") qiymatga qo'shilmasin
+        parser = configparser.ConfigParser(inline_comment_prefixes=("#",))
+        # Eski config.ini fayllarida yo'q kalitlar uchun standart qiymatlar
+        parser.read_dict({"DEFAULT": DEFAULTS})
+        self._mtime = self._stat()
+        try:
+            parser.read(self.config_file)
+        except configparser.Error as e:
+            raise SettingsError(f"{self.config_file} o'qilmadi: {e}")
+        for key in DEFAULTS:
+            env = os.environ.get(ENV_PREFIX + key.upper())
+            if env is not None:
+                parser["DEFAULT"][key] = env
+        for key, value in self._overrides.items():
+            parser["DEFAULT"][key] = value
+        return parser
+
+    def reload(self) -> Dict[str, Tuple[Any, Any]]:
+        """config.ini o'zgargan bo'lsa qayta o'qiydi va o'zgargan kalitlarni qaytaradi.
+
+        Yangi fayl noto'g'ri bo'lsa yoki fayl o'chirilgan/ko'chirilgan bo'lsa
+        `SettingsError` ko'tariladi va oldingi nusxa ishlatilishda davom etadi
+        (shu holat qayta xabar qilinmaydi).
+        """
+        mtime = self._stat()
+        if mtime == self._mtime:
+            return {}
+        if mtime is None:
+            # Fayl yo'qolgani ishlayotgan jarayonni standart qiymatlarga qaytarmasin
+            self._mtime = None
+            raise SettingsError(f"{self.config_file} topilmadi")
+        # Muharrir faylni hali yozayotgan bo'lishi mumkin: yarim fayl standart qiymatlarga qaytarmasin
+        if mtime is not None and time.time() - mtime < self.RELOAD_SETTLE:
+            return {}
+        parser = self._read()
+        settings = Settings(dict(parser["DEFAULT"]))
+        changes = self.settings.diff(settings)
+        self.config, self.settings = parser, settings
+        return changes
+
+    def override(self, **values: Any):
+        """Dastur ichidan qiymat berish (masalan, benchmarklarda); qayta yuklashda ham saqlanadi"""
+        unknown = set(values) - set(DEFAULTS)
+        if unknown:
+            raise KeyError(f"Noma'lum sozlama(lar): {', '.join(sorted(unknown))}")
+        previous = self._overrides
+        self._overrides = {**previous, **{key: str(value) for key, value in values.items()}}
+        try:
+            parser = self._read()
+            settings = Settings(dict(parser["DEFAULT"]))
+        except SettingsError:
+            self._overrides = previous
+            raise
+        self.config, self.settings = parser, settings
+
+    def ensure_file(self):
+        """config.ini bo'lmasa standart qiymatlar bilan yaratadi"""
         if not self.config_file.exists():
             self._create_default_config()
-        
-        self.config.read(self.config_file)
-    
+
     def _create_default_config(self):
-        self.config["DEFAULT"] = {
-            "max_concurrent_tasks": "5",
-            "delay_hours": "1",
-            "time_between_accounts": "5",
-            "max_retries": "3",
-            "retry_delay": "2",
-            "cookie_file": "cookie.txt",
-            "generated_emails_file": "generated_emails.txt",
-            "backup_dir": "backups",
-            "timezone": "Europe/Moscow",
-            "label": "rtuna's gen",
-            "base_url_v1": "https://p68-maildomainws.icloud.com/v1/hme",
-            "base_url_v2": "https://p68-maildomainws.icloud.com/v2/hme"
-        }
-        
+        defaults = configparser.ConfigParser()
+        defaults["DEFAULT"] = DEFAULTS
+
         with open(self.config_file, "w") as f:
-            self.config.write(f)
-    
+            defaults.write(f)
+        self._mtime = self._stat()
+
     def get(self, section: str, key: str) -> Any:
         return self.config.get(section, key)
-    
+
     def getint(self, section: str, key: str) -> int:
         return self.config.getint(section, key)
-    
+
     def getfloat(self, section: str, key: str) -> float:
         return self.config.getfloat(section, key)
-    
+
     def getboolean(self, section: str, key: str) -> bool:
         return self.config.getboolean(section, key)
-    
+
     @property
     def params(self) -> Dict[str, str]:
         return {
@@ -52,4 +271,4 @@ class Config:
             "dsid": "",
         }
 
-config = Config()
\ No newline at end of file
+config = Config()
@@ -1,3 +1,19 @@
-from .hidemyemail import HideMyEmail
+import importlib
 
-__all__ = ['HideMyEmail']
+# Eksportlar birinchi murojaatda yuklanadi: `icloud.store` kabi yengil
+# modullar aiohttp ni import qilmasdan ishlatilishi mumkin.
+_EXPORTS = {
+    'HideMyEmail': '.hidemyemail',
+    'HideMyEmailError': '.errors',
+    'AliasStore': '.store',
+    'Alias': '.store',
+    'AliasPool': '.pool',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
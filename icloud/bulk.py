@@ -0,0 +1,187 @@
+"""Mavjud emaillar ustida ommaviy amallar: yorliqni o'zgartirish,
+o'chirib qo'yish, qayta yoqish va butunlay o'chirish.
+
+Har bir email alohida `RetryPolicy` bilan qayta uriniladi, parallellik
+semafor bilan cheklanadi. Avtorizatsiya yoki limit xatosida qolgan
+emaillar boshlanmaydi va hisobotda "skipped" bo'lib qoladi.
+"""
+
+import asyncio
+import json
+import os
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from .errors import ErrorKind, error_message
+from .retry import RetryPolicy
+from .store import Alias, AliasStore
+
+ACTIONS = ("relabel", "deactivate", "reactivate", "delete")
+STOP_KINDS = {ErrorKind.AUTH, ErrorKind.QUOTA}
+
+
+class BulkResult:
+    __slots__ = ("hme", "anonymous_id", "status", "reason", "kind")
+
+    def __init__(self, hme: str, anonymous_id: str, status: str, reason: str = "", kind: Optional[str] = None):
+        self.hme = hme
+        self.anonymous_id = anonymous_id
+        self.status = status          # ok | skipped | failed
+        self.reason = reason
+        self.kind = kind
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"BulkResult({self.hme!r}, status={self.status!r})"
+
+
+def summarize(results: List[BulkResult]) -> Dict[str, int]:
+    counts = Counter(result.status for result in results)
+    return {"total": len(results), "ok": counts["ok"], "skipped": counts["skipped"], "failed": counts["failed"]}
+
+
+def write_report(
+    path: Union[str, Path],
+    action: str,
+    results: List[BulkResult],
+    started: float,
+    **fields: Any,
+) -> Path:
+    """Natijalar hisobotini JSON faylga atomik yozadi"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        "action": action,
+        **fields,
+        "started": datetime.fromtimestamp(started).isoformat(timespec="seconds"),
+        "finished": datetime.now().isoformat(timespec="seconds"),
+        "summary": summarize(results),
+        "items": [result.as_dict() for result in results],
+    }
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+    return path
+
+
+class BulkOperation:
+    """Tanlangan emaillarga bitta amalni parallel qo'llaydi.
+
+        operation = BulkOperation(client, "relabel", label="newsletter", store=store)
+        results = await operation.run(rows)
+
+    `rows` - `AliasStore.query` qaytaradigan `Alias` yozuvlari. Allaqachon kerakli
+    holatdagi emaillar serverga yuborilmaydi ("skipped"). Muvaffaqiyatli
+    o'zgarishlar `store` ga ham yoziladi.
+    """
+
+    def __init__(
+        self,
+        client,
+        action: str,
+        label: Optional[str] = None,
+        note: Optional[str] = None,
+        concurrency: int = 5,
+        retry_policy: Optional[RetryPolicy] = None,
+        store: Optional[AliasStore] = None,
+        on_retry: Optional[Callable[[int, ErrorKind, Dict[str, Any], float], None]] = None,
+    ):
+        if action not in ACTIONS:
+            raise ValueError(f"Noma'lum amal: {action}. Mavjud: {', '.join(ACTIONS)}")
+        if action == "relabel" and label is None:
+            raise ValueError("relabel uchun yangi yorliq kerak")
+        self.client = client
+        self.action = action
+        self.label = label
+        self.note = note
+        self.concurrency = max(1, concurrency)
+        self.retry_policy = retry_policy or RetryPolicy.from_config()
+        self.store = store
+        self.on_retry = on_retry
+        self.stopped: Optional[ErrorKind] = None
+
+    def needs_change(self, row: Alias) -> bool:
+        if self.action == "deactivate":
+            return row.is_active
+        if self.action == "reactivate":
+            return not row.is_active
+        if self.action == "relabel":
+            return row.label != self.label or (self.note is not None and row.note != self.note)
+        return True
+
+    async def _call(self, call: Callable[[], Any]):
+        return await self.retry_policy.run(call, self.on_retry, stage=self.action)
+
+    async def _apply(self, row: Alias):
+        anonymous_id = row.anonymous_id
+        client = self.client
+        if self.action == "relabel":
+            note = self.note if self.note is not None else row.note
+            return await self._call(lambda: client.update_metadata(anonymous_id, self.label, note))
+        if self.action == "deactivate":
+            return await self._call(lambda: client.deactivate_email(anonymous_id))
+        if self.action == "reactivate":
+            return await self._call(lambda: client.reactivate_email(anonymous_id))
+        # iCloud faol emailni o'chirmaydi: avval o'chirib qo'yiladi
+        if row.is_active:
+            res, kind = await self._call(lambda: client.deactivate_email(anonymous_id))
+            if kind is not None:
+                return res, kind
+            if self.store is not None:
+                self.store.update(anonymous_id, is_active=False)
+        return await self._call(lambda: client.delete_email(anonymous_id))
+
+    def _update_store(self, row: Alias):
+        anonymous_id = row.anonymous_id
+        if self.action == "relabel":
+            fields = {"label": self.label}
+            if self.note is not None:
+                fields["note"] = self.note
+            self.store.update(anonymous_id, **fields)
+        elif self.action == "delete":
+            self.store.delete(anonymous_id)
+        else:
+            self.store.update(anonymous_id, is_active=self.action == "reactivate")
+
+    async def run(
+        self,
+        rows: List[Alias],
+        on_result: Optional[Callable[[BulkResult], None]] = None,
+    ) -> List[BulkResult]:
+        """Amalni bajaradi va natijalarni `rows` tartibida qaytaradi"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results: List[Optional[BulkResult]] = [None] * len(rows)
+        self.stopped = None
+
+        async def worker(slot: int, row: Alias):
+            async with semaphore:
+                result = await self._process(row)
+            results[slot] = result
+            if on_result is not None:
+                on_result(result)
+
+        await asyncio.gather(*(worker(slot, row) for slot, row in enumerate(rows)))
+        return results
+
+    async def _process(self, row: Alias) -> BulkResult:
+        hme, anonymous_id = row.hme, row.anonymous_id
+        if self.stopped is not None:
+            return BulkResult(hme, anonymous_id, "skipped", "to'xtatildi", self.stopped.value)
+        if not self.needs_change(row):
+            return BulkResult(hme, anonymous_id, "skipped", "o'zgartirish shart emas")
+        try:
+            res, kind = await self._apply(row)
+        except Exception as e:
+            return BulkResult(hme, anonymous_id, "failed", str(e), ErrorKind.FATAL.value)
+        if kind is not None:
+            if kind in STOP_KINDS:
+                self.stopped = kind
+            return BulkResult(hme, anonymous_id, "failed", error_message(res), kind.value)
+        if self.store is not None:
+            self._update_store(row)
+        return BulkResult(hme, anonymous_id, "ok")
@@ -0,0 +1,149 @@
+"""JSON kodek va Hide My Email javob turi.
+
+`orjson` o'rnatilgan bo'lsa undan foydalaniladi (bayt satrdan to'g'ridan
+to'g'ri, oraliq `str` siz dekodlaydi), aks holda standart `json`.
+`APIResponse` - server JSON i (dict) va HTTP holati; har qanday xato,
+jumladan tarmoq va noto'g'ri JSON xatolari, bir xil ko'rinishda:
+
+    {"success": False, "error": {"errorCode": "...", "errorMessage": "..."}}
+"""
+
+import json
+from typing import Any, Dict, Mapping, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - ixtiyoriy bog'liqlik
+    orjson = None
+
+from .errors import (
+    INVALID_RESPONSE_CODE,
+    NETWORK_ERROR_CODE,
+    TIMEOUT_ERROR_CODE,
+    ErrorKind,
+    classify,
+    error_message,
+)
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+Buffer = Union[bytes, bytearray, str]
+
+if orjson is not None:
+    DecodeError = orjson.JSONDecodeError  # ValueError ning vorisi
+
+    def loads(data: Buffer) -> Any:
+        return orjson.loads(data)
+
+    def dumps(obj: Any) -> bytes:
+        """Ixcham UTF-8 JSON (ensure_ascii=False kabi)"""
+        return orjson.dumps(obj)
+else:
+    DecodeError = ValueError
+
+    def loads(data: Buffer) -> Any:
+        return json.loads(data)
+
+    def dumps(obj: Any) -> bytes:
+        """Ixcham UTF-8 JSON (ensure_ascii=False kabi)"""
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class APIResponse(dict):
+    """Hide My Email javobi: dict sifatida server JSON i, `status` - HTTP holati.
+
+    dict bo'lgani uchun `classify`, kesh va mavjud chaqiruvchilar uni
+    oddiy javob kabi ishlatadi; xususiyatlar esa xato maydonlarini
+    qidirmasdan o'qishga imkon beradi.
+    """
+
+    __slots__ = ("status",)
+
+    def __init__(self, data: Mapping[str, Any] = (), status: Optional[int] = None):
+        super().__init__(data)
+        self.status = status
+
+    @classmethod
+    def failure(
+        cls,
+        message: str,
+        code: str = "",
+        status: Optional[int] = None,
+        **fields: Any,
+    ) -> "APIResponse":
+        res = cls({"success": False, "error": {"errorCode": code, "errorMessage": message}, **fields}, status)
+        if status is not None and status >= 400:
+            res["status"] = status
+        return res
+
+    @property
+    def ok(self) -> bool:
+        return classify(self) is None
+
+    @property
+    def kind(self) -> Optional[ErrorKind]:
+        """Xato turi; muvaffaqiyatli javobda None"""
+        return classify(self)
+
+    @property
+    def error_code(self) -> str:
+        error = self.get("error")
+        return str(error.get("errorCode") or "") if isinstance(error, dict) else ""
+
+    @property
+    def error_message(self) -> str:
+        return error_message(self)
+
+    @property
+    def result(self) -> Dict[str, Any]:
+        result = self.get("result")
+        return result if isinstance(result, dict) else {}
+
+    def __repr__(self) -> str:
+        return f"APIResponse(status={self.status!r}, {dict.__repr__(self)})"
+
+
+def _normalize_error(data: Dict[str, Any]):
+    """Turli xato ko'rinishlarini `error: {errorCode, errorMessage}` ga keltiradi"""
+    error = data.get("error")
+    if isinstance(error, dict):
+        return
+    code = data.get("errorCode")
+    message = data.get("errorMessage") or data.get("reason") or (error if isinstance(error, str) else None)
+    if code is None and message is None and not error:
+        return
+    data["success"] = False
+    data["error"] = {"errorCode": str(code or ""), "errorMessage": message or str(code or "Noma'lum xato")}
+
+
+def decode_response(body: Buffer, status: int, headers: Optional[Mapping[str, str]] = None) -> APIResponse:
+    """HTTP javob tanasidan `APIResponse` quradi (tana baytlarini nusxalamasdan)"""
+    if status == 304:
+        return APIResponse({"success": True, "not_modified": True}, status)
+    try:
+        data = loads(body) if body and not body.isspace() else None  # bo'sh tana - JSON emas
+    except DecodeError:
+        data = None
+    if not isinstance(data, dict):
+        res = APIResponse.failure(f"HTTP {status}: javob JSON emas", INVALID_RESPONSE_CODE, status)
+    else:
+        res = APIResponse(data, status)
+        if not res.get("success"):
+            _normalize_error(res)
+        if status >= 400:
+            res["status"] = status
+    if status >= 400 and headers is not None and "Retry-After" in headers:
+        try:
+            res["retry_after"] = float(headers["Retry-After"])
+        except ValueError:
+            pass
+    return res
+
+
+def network_failure(error: BaseException) -> APIResponse:
+    """Javob umuman kelmagan holat (ulanish uzildi, DNS va h.k.)"""
+    return APIResponse.failure(str(error) or type(error).__name__, NETWORK_ERROR_CODE)
+
+
+def timeout_failure() -> APIResponse:
+    return APIResponse.failure("So'rov vaqti tugadi", TIMEOUT_ERROR_CODE, timeout=True)
@@ -0,0 +1,183 @@
+"""cookie.txt ni cookie to'plamiga (jar) o'qish.
+
+Uchta format qo'llab-quvvatlanadi:
+
+* `nom=qiymat; nom2=qiymat2` - bitta qator (EditThisCookie "semicolon
+  separated", `Cookie:` sarlavhasi bilan ham);
+* Netscape `cookies.txt` - tab bilan ajratilgan 7 ustun, amal qilish
+  muddati bilan (`#HttpOnly_` qatorlari ham);
+* EditThisCookie JSON eksporti (`expirationDate` bilan).
+
+Muddat faqat oxirgi ikki formatda ma'lum bo'ladi; birinchisida sessiya
+haqiqiyligini faqat server tekshiruvi (`validate_session`) aniqlaydi.
+"""
+
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+# iCloud sessiyasini ushlab turadigan cookie lar: ulardan birining
+# muddati tugasa, qolganlari bo'lsa ham so'rovlar 421/401 qaytaradi
+SESSION_COOKIES = ("X-APPLE-WEBAUTH-TOKEN", "X-APPLE-WEBAUTH-USER", "X-APPLE-DS-WEB-SESSION-TOKEN")
+
+_HTTPONLY_PREFIX = "#HttpOnly_"
+
+
+class Cookie:
+    __slots__ = ("name", "value", "domain", "path", "expires", "secure")
+
+    def __init__(
+        self,
+        name: str,
+        value: str,
+        domain: str = "",
+        path: str = "/",
+        expires: Optional[float] = None,
+        secure: bool = False,
+    ):
+        self.name = name
+        self.value = value
+        self.domain = domain
+        self.path = path
+        self.expires = expires      # unix soniya; None - sessiya cookie si (muddati noma'lum)
+        self.secure = secure
+
+    def expired(self, now: Optional[float] = None) -> bool:
+        return self.expires is not None and self.expires <= (time.time() if now is None else now)
+
+    def __repr__(self) -> str:
+        return f"Cookie({self.name!r}, domain={self.domain!r}, expires={self.expires!r})"
+
+
+class CookieJar:
+    """cookie.txt dagi cookie lar; `header()` - `Cookie` sarlavhasi qiymati"""
+
+    def __init__(self, cookies: Iterable[Cookie] = (), source: Optional[Path] = None, mtime: Optional[float] = None):
+        # Bir xil nomdagi cookie lardan oxirgisi qoladi (brauzer eksportidagi kabi)
+        self.cookies: Dict[str, Cookie] = {}
+        for cookie in cookies:
+            self.cookies[cookie.name] = cookie
+        self.source = source
+        self.mtime = mtime
+
+    def __bool__(self) -> bool:
+        return bool(self.cookies)
+
+    def __len__(self) -> int:
+        return len(self.cookies)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.cookies
+
+    def header(self, now: Optional[float] = None) -> str:
+        """Muddati tugamagan cookie lar `nom=qiymat; ...` ko'rinishida"""
+        return "; ".join(
+            f"{cookie.name}={cookie.value}" for cookie in self.cookies.values() if not cookie.expired(now)
+        )
+
+    @property
+    def missing(self) -> List[str]:
+        """Sessiya uchun kerakli, lekin faylda yo'q cookie lar"""
+        return [name for name in SESSION_COOKIES if name not in self.cookies]
+
+    @property
+    def expires_at(self) -> Optional[float]:
+        """Sessiya tugaydigan vaqt: sessiya cookie laridan eng erta muddat (noma'lum bo'lsa None)"""
+        expiries = [
+            cookie.expires for name, cookie in self.cookies.items()
+            if name in SESSION_COOKIES and cookie.expires is not None
+        ]
+        return min(expiries) if expiries else None
+
+    def expires_in(self, now: Optional[float] = None) -> Optional[float]:
+        """Sessiya tugashigacha qolgan soniyalar (manfiy - tugagan; noma'lum bo'lsa None)"""
+        expires_at = self.expires_at
+        if expires_at is None:
+            return None
+        return expires_at - (time.time() if now is None else now)
+
+
+def _parse_header(text: str) -> List[Cookie]:
+    if text.lower().startswith("cookie:"):
+        text = text[len("cookie:"):]
+    cookies = []
+    for pair in text.split(";"):
+        name, sep, value = pair.strip().partition("=")
+        if sep and name:
+            cookies.append(Cookie(name.strip(), value.strip()))
+    return cookies
+
+
+def _parse_netscape(lines: List[str]) -> List[Cookie]:
+    cookies = []
+    for line in lines:
+        if line.startswith(_HTTPONLY_PREFIX):
+            line = line[len(_HTTPONLY_PREFIX):]
+        elif line.startswith("#"):
+            continue
+        fields = line.split("\t")
+        if len(fields) != 7:
+            continue
+        domain, _, path, secure, expires, name, value = fields
+        try:
+            expiry = float(expires)
+        except ValueError:
+            expiry = 0.0
+        cookies.append(Cookie(
+            name, value, domain=domain, path=path,
+            expires=expiry if expiry > 0 else None,
+            secure=secure.upper() == "TRUE",
+        ))
+    return cookies
+
+
+def _parse_json(data: Any) -> List[Cookie]:
+    cookies = []
+    for item in data if isinstance(data, list) else []:
+        if not isinstance(item, dict) or not item.get("name"):
+            continue
+        expires = item.get("expirationDate", item.get("expires"))
+        cookies.append(Cookie(
+            str(item["name"]),
+            str(item.get("value", "")),
+            domain=item.get("domain", ""),
+            path=item.get("path", "/"),
+            expires=float(expires) if isinstance(expires, (int, float)) and expires > 0 else None,
+            secure=bool(item.get("secure")),
+        ))
+    return cookies
+
+
+def parse_cookies(text: str) -> List[Cookie]:
+    """Fayl matnini formatini aniqlab cookie larga ajratadi"""
+    stripped = text.strip()
+    if not stripped:
+        return []
+    if stripped[0] == "[":
+        try:
+            return _parse_json(json.loads(stripped))
+        except ValueError:
+            pass
+    lines = [line.rstrip("\r\n") for line in stripped.splitlines()]
+    if any(line.count("\t") == 6 for line in lines):
+        return _parse_netscape(lines)
+    # Eski format: birinchi bo'sh bo'lmagan qator
+    first = next(line.strip() for line in lines if line.strip())
+    return _parse_header(first)
+
+
+def load_cookie_jar(path: Union[str, Path]) -> CookieJar:
+    """cookie.txt ni o'qiydi; fayl yo'q bo'lsa bo'sh jar"""
+    path = Path(path)
+    try:
+        mtime = path.stat().st_mtime
+        text = path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return CookieJar(source=path)
+    return CookieJar(parse_cookies(text), source=path, mtime=mtime)
+
+
+def read_cookie_file(path: Union[str, Path]) -> str:
+    """`Cookie` sarlavhasi qiymati; fayl yo'q yoki bo'sh bo'lsa ''"""
+    return load_cookie_jar(path).header()
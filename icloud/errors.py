@@ -0,0 +1,102 @@
+from enum import Enum
+from typing import Any, Dict, Optional
+
+
+class HideMyEmailError(Exception):
+    """Hide My Email API xatosi"""
+
+    def __init__(
+        self,
+        reason: str,
+        status: Optional[int] = None,
+        code: Optional[str] = None,
+        timeout: bool = False,
+    ):
+        super().__init__(reason)
+        self.reason = reason
+        self.status = status
+        self.code = code
+        self.timeout = timeout
+
+    @property
+    def kind(self) -> "ErrorKind":
+        """Xato turi (`classify` bilan bir xil qoidalar bo'yicha)"""
+        return classify({
+            "status": self.status,
+            "timeout": self.timeout,
+            "reason": self.reason,
+            "error": {"errorCode": self.code, "errorMessage": self.reason} if self.code else 1,
+        })
+
+
+class ErrorKind(Enum):
+    TIMEOUT = "timeout"        # So'rov vaqti tugadi - shu bosqichni qayta yuborish
+    AUTH = "auth"              # Cookie/sessiya yaroqsiz - to'xtash
+    QUOTA = "quota"            # Limitga yetildi - keyingi oynani kutish
+    TRANSIENT = "transient"    # 5xx, 429, tarmoq uzilishi - backoff bilan qayta urinish
+    FATAL = "fatal"            # Qayta urinish foyda bermaydigan xato
+
+
+AUTH_STATUSES = {401, 403, 421}
+AUTH_ERROR_CODES = {"UNAUTHORIZED", "AUTHENTICATION_FAILED", "-20101"}
+QUOTA_ERROR_CODES = {"-41015"}
+QUOTA_KEYWORDS = ("limit", "maximum", "5 per hour", "too many")
+
+# Server emas, klient tomonda hosil qilingan xato kodlari (`icloud.codec`)
+NETWORK_ERROR_CODE = "NETWORK_ERROR"        # Javob kelmadi: ulanish, DNS, TLS
+TIMEOUT_ERROR_CODE = "TIMEOUT"              # So'rov vaqti tugadi
+INVALID_RESPONSE_CODE = "INVALID_RESPONSE"  # Javob JSON obyekt emas (proksi sahifasi va h.k.)
+LOCAL_ERROR_CODES = {NETWORK_ERROR_CODE, TIMEOUT_ERROR_CODE, INVALID_RESPONSE_CODE}
+
+
+def error_message(res: Optional[Dict[str, Any]]) -> str:
+    """Xato javobidan o'qiladigan xabar"""
+    if not res:
+        return "Server javob bermadi"
+    error = res.get("error")
+    if isinstance(error, dict):
+        return error.get("errorMessage") or error.get("errorCode") or "Noma'lum xato"
+    return res.get("reason") or "Noma'lum xato"
+
+
+def classify(res: Optional[Dict[str, Any]]) -> Optional[ErrorKind]:
+    """Javobni xato turiga ajratadi; muvaffaqiyatli bo'lsa None.
+
+    Avval HTTP holat kodi, keyin `error.errorCode`, eng oxirida
+    xabar matni tekshiriladi.
+    """
+    if res and res.get("success"):
+        return None
+    if not res:
+        return ErrorKind.TRANSIENT
+    if res.get("timeout"):
+        return ErrorKind.TIMEOUT
+
+    # `APIResponse` da HTTP holati har doim atributda; oddiy dict larda faqat kalitda
+    status = getattr(res, "status", None)
+    if status is None:
+        status = res.get("status")
+    if status in AUTH_STATUSES:
+        return ErrorKind.AUTH
+    if status == 429 or (status is not None and status >= 500):
+        return ErrorKind.TRANSIENT
+
+    error = res.get("error")
+    if isinstance(error, dict):
+        code = str(error.get("errorCode", ""))
+        if code in LOCAL_ERROR_CODES:
+            # Javob yo'q yoki buzilgan: HTTP holati bo'lmasa vaqtinchalik deb hisoblanadi
+            return ErrorKind.TRANSIENT if status is None else ErrorKind.FATAL
+        if code in AUTH_ERROR_CODES:
+            return ErrorKind.AUTH
+        if code in QUOTA_ERROR_CODES:
+            return ErrorKind.QUOTA
+        message = str(error.get("errorMessage", "")).lower()
+        if any(keyword in message for keyword in QUOTA_KEYWORDS):
+            return ErrorKind.QUOTA
+        return ErrorKind.FATAL
+
+    # Tarmoq xatosi (javob umuman kelmagan)
+    if status is None:
+        return ErrorKind.TRANSIENT
+    return ErrorKind.FATAL
@@ -1,31 +1,43 @@
 import asyncio
+import codecs
+import json
+import re
+import time
 import aiohttp
-import ssl
-import certifi
-from typing import Dict, Any, Optional
+from typing import AsyncIterator, Dict, Any, MutableMapping, Optional
 from config.settings import config
+from utils.metrics import record_list_sync, record_request
+from utils.profiling import record, stage, watch_loop
+from .codec import APIResponse, decode_response, network_failure, timeout_failure
+from .errors import INVALID_RESPONSE_CODE, HideMyEmailError, classify
+from .store import AliasStore, SyncStats
+from .transport import get_transport
+
+# Shartli so'rovlar uchun saqlanadigan javob sarlavhalari
+_VALIDATORS = ("ETag", "Last-Modified")
+
+# `"hmeEmails": [` kaliti (satr ichidagi ekranlangan qo'shtirnoqlar hisobga olinmaydi)
+_HME_ARRAY = re.compile(r'(?<!\\)"hmeEmails"\s*:\s*\[')
+_SEPARATORS = " \t\r\n,"
 
 class HideMyEmail:
     def __init__(self, cookies: str = ""):
-        self.base_url_v1 = config.get("DEFAULT", "base_url_v1")
-        self.base_url_v2 = config.get("DEFAULT", "base_url_v2")
+        self.base_url_v1 = config.settings.base_url_v1
+        self.base_url_v2 = config.settings.base_url_v2
+        self.validate_url = config.settings.validate_url
         self.params = config.params
-        self.label = config.get("DEFAULT", "label")
+        self.label = config.settings.label
         self.cookies = cookies
 
     async def __aenter__(self):
-        connector = aiohttp.TCPConnector(
-            ssl_context=ssl.create_default_context(cafile=certifi.where())
-        )
-        self.session = aiohttp.ClientSession(
-            headers=self._get_headers(),
-            timeout=aiohttp.ClientTimeout(total=10),
-            connector=connector,
-        )
+        watch_loop()
+        self.transport = get_transport()
+        self.session = self.transport.session(self._get_headers())
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         await self.session.close()
+        await self.transport.release()
 
     def _get_headers(self) -> Dict[str, str]:
         return {
@@ -52,46 +64,215 @@ class HideMyEmail:
     @cookies.setter
     def cookies(self, cookies: str):
         self._cookies = cookies.strip()
+        # Ochiq sessiya bo'lsa yangi cookie keyingi so'rovdan boshlab ishlatiladi
+        session = getattr(self, "session", None)
+        if session is not None and not session.closed:
+            session.headers["Cookie"] = self._cookies
+
+    async def _request(self, method: str, url: str, **kwargs) -> APIResponse:
+        """So'rov yuborish; xato bo'lsa HTTP holati (`status`) bilan lug'at qaytaradi"""
+        endpoint = url.rsplit("/", 1)[-1]
+        started = time.perf_counter()
+        data = await self._send(method, url, **kwargs)
+        duration = time.perf_counter() - started
+        kind = classify(data)
+        record_request(endpoint, duration, "success" if kind is None else kind.value)
+        record(f"http.{endpoint}", duration)
+        return data
 
-    async def generate_email(self) -> Dict[str, Any]:
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        response_headers: Optional[MutableMapping[str, str]] = None,
+        **kwargs,
+    ) -> APIResponse:
+        """`response_headers` berilsa unga ETag/Last-Modified yoziladi; 304 - `not_modified`"""
         try:
-            async with self.session.post(
-                f"{self.base_url_v1}/generate",
-                params=self.params,
-                json={"langCode": "en-us"}
-            ) as resp:
-                return await resp.json()
+            async with self.session.request(method, url, params=self.params, **kwargs) as resp:
+                if response_headers is not None:
+                    for name in _VALIDATORS:
+                        if name in resp.headers:
+                            response_headers[name] = resp.headers[name]
+                body = await resp.read()
+                with stage("decode"):
+                    return decode_response(body, resp.status, resp.headers)
         except asyncio.TimeoutError:
-            return {"error": 1, "reason": "So'rov vaqti tugadi"}
+            return timeout_failure()
         except Exception as e:
-            return {"error": 1, "reason": str(e)}
+            return network_failure(e)
+
+    async def validate_session(self) -> APIResponse:
+        """Sessiyani arzon so'rov bilan tekshiradi (email yaratmaydi, limitga ta'sir qilmaydi).
+
+        iCloud `validate` javobida `success` maydoni yo'q: `dsInfo` kelsa
+        sessiya yaroqli, eskirgan sessiyaga server 421/401 qaytaradi.
+        """
+        started = time.perf_counter()
+        res = await self._send("POST", self.validate_url, data="null")
+        if isinstance(res.get("dsInfo"), dict):
+            res["success"] = True
+        kind = classify(res)
+        record_request("validate", time.perf_counter() - started, "success" if kind is None else kind.value)
+        return res
+
+    async def generate_email(self) -> APIResponse:
+        return await self._request(
+            "POST",
+            f"{self.base_url_v1}/generate",
+            json={"langCode": "en-us"}
+        )
+
+    async def reserve_email(self, email: str) -> APIResponse:
+        payload = {
+            "hme": email,
+            "label": self.label,
+            "note": "rtuna's iCloud email generator tomonidan yaratilgan",
+        }
+        return await self._request(
+            "POST",
+            f"{self.base_url_v1}/reserve",
+            json=payload
+        )
+
+    async def update_metadata(self, anonymous_id: str, label: str, note: str = "") -> APIResponse:
+        return await self._request(
+            "POST",
+            f"{self.base_url_v1}/updateMetaData",
+            json={"anonymousId": anonymous_id, "label": label, "note": note}
+        )
+
+    async def deactivate_email(self, anonymous_id: str) -> APIResponse:
+        return await self._request("POST", f"{self.base_url_v1}/deactivate", json={"anonymousId": anonymous_id})
 
-    async def reserve_email(self, email: str) -> Dict[str, Any]:
+    async def reactivate_email(self, anonymous_id: str) -> APIResponse:
+        return await self._request("POST", f"{self.base_url_v1}/reactivate", json={"anonymousId": anonymous_id})
+
+    async def delete_email(self, anonymous_id: str) -> APIResponse:
+        """Emailni butunlay o'chiradi (iCloud faqat nofaol emaillarni o'chiradi)"""
+        return await self._request("POST", f"{self.base_url_v1}/delete", json={"anonymousId": anonymous_id})
+
+    async def list_email(self) -> APIResponse:
+        """Butun `/list` javobi bitta dict sifatida (katta ro'yxatlar uchun `iter_emails`)"""
+        return await self._request("GET", f"{self.base_url_v2}/list")
+
+    async def iter_emails(
+        self,
+        chunk_size: int = 64 * 1024,
+        validators: Optional[MutableMapping[str, Any]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """`/list` javobidagi `hmeEmails` qatorlarini oqim bo'yicha birma-bir qaytaradi.
+
+        Butun javob xotiraga yig'ilmaydi: har bir obyekt bufer to'lishi bilan
+        ajratiladi. Xato yoki to'liq bo'lmagan javobda `HideMyEmailError`.
+        `validators` dagi ETag/Last-Modified bilan shartli so'rov yuboriladi va
+        javobdagi yangi qiymatlar unga yoziladi; 304 da hech narsa qaytmaydi,
+        `validators["not_modified"]` esa True bo'ladi.
+        """
+        started = time.perf_counter()
         try:
-            payload = {
-                "hme": email,
-                "label": self.label,
-                "note": "rtuna's iCloud email generator tomonidan yaratilgan",
-            }
-            async with self.session.post(
-                f"{self.base_url_v1}/reserve",
-                params=self.params,
-                json=payload
-            ) as resp:
-                return await resp.json()
-        except asyncio.TimeoutError:
-            return {"error": 1, "reason": "So'rov vaqti tugadi"}
-        except Exception as e:
-            return {"error": 1, "reason": str(e)}
+            async for row in self._iter_list(chunk_size, validators):
+                yield row
+        except HideMyEmailError as e:
+            record_request("list", time.perf_counter() - started, e.kind.value)
+            raise
+        record_request("list", time.perf_counter() - started, "success")
 
-    async def list_email(self) -> Dict[str, Any]:
+    async def _iter_list(
+        self, chunk_size: int, validators: Optional[MutableMapping[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        decoder = json.JSONDecoder()
+        text_decoder = codecs.getincrementaldecoder("utf-8")()
+        buf = ""
+        pos = 0
+        in_array = False
+        done = False
+        status = None
+        headers = {}
+        if validators is not None:
+            if validators.get("ETag"):
+                headers["If-None-Match"] = validators["ETag"]
+            if validators.get("Last-Modified"):
+                headers["If-Modified-Since"] = validators["Last-Modified"]
         try:
             async with self.session.get(
                 f"{self.base_url_v2}/list",
-                params=self.params
+                params=self.params,
+                headers=headers
             ) as resp:
-                return await resp.json()
+                status = resp.status
+                if status == 304 and validators is not None:
+                    validators["not_modified"] = True
+                    return
+                if validators is not None and status < 400:
+                    for name in _VALIDATORS:
+                        validators[name] = resp.headers.get(name)
+                async for chunk in resp.content.iter_chunked(chunk_size):
+                    buf += text_decoder.decode(chunk)
+                    if not in_array:
+                        match = _HME_ARRAY.search(buf)
+                        if not match:
+                            continue
+                        in_array = True
+                        pos = match.end()
+
+                    while True:
+                        while pos < len(buf) and buf[pos] in _SEPARATORS:
+                            pos += 1
+                        if pos >= len(buf):
+                            break
+                        if buf[pos] == "]":
+                            done = True
+                            break
+                        try:
+                            row, pos = decoder.raw_decode(buf, pos)
+                        except json.JSONDecodeError:
+                            break  # obyekt hali to'liq kelmagan
+                        yield row
+
+                    if done:
+                        break
+                    buf = buf[pos:]
+                    pos = 0
         except asyncio.TimeoutError:
-            return {"error": 1, "reason": "So'rov vaqti tugadi"}
-        except Exception as e:
-            return {"error": 1, "reason": str(e)}
+            raise HideMyEmailError("So'rov vaqti tugadi", status=status, timeout=True)
+        except aiohttp.ClientError as e:
+            raise HideMyEmailError(str(e), status=status)
+
+        if not in_array:
+            buf += text_decoder.decode(b"", final=True)
+            res = decode_response(buf, status or 200)
+            if res.error_code == INVALID_RESPONSE_CODE:
+                raise HideMyEmailError("Server javobi JSON emas", status=status)
+            if isinstance(res.get("error"), dict):
+                raise HideMyEmailError(res.error_message, status=status, code=res.error_code or None)
+            raise HideMyEmailError("Javobda hmeEmails topilmadi", status=status)
+        if not done:
+            raise HideMyEmailError("Server javobi to'liq emas", status=status)
+
+    async def sync_store(self, store: AliasStore) -> SyncStats:
+        """`iter_emails` oqimini mahalliy indeksga qo'llaydi; xatoda o'zgarishlar bekor qilinadi.
+
+        Oldingi sinxronlashdagi ETag/Last-Modified bilan shartli so'rov yuboriladi:
+        ro'yxat o'zgarmagan bo'lsa (304) u yuklanmaydi, indeks yangi deb belgilanadi.
+        """
+        validators = store.list_validators()
+        session = None
+        try:
+            with stage("sync"):
+                async for row in self.iter_emails(validators=validators):
+                    if session is None:
+                        session = store.begin_sync()
+                    session.feed(row)
+        except BaseException:
+            if session is not None:
+                session.rollback()
+            raise
+        if validators.pop("not_modified", False):
+            record_list_sync("not_modified")
+            return store.touch()
+        if session is None:
+            session = store.begin_sync()
+        stats = session.commit(validators)
+        record_list_sync("full")
+        return stats
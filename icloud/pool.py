@@ -0,0 +1,176 @@
+"""Oldindan zaxiralangan, hali hech kimga berilmagan emaillar puli.
+
+Demon (`cli.py pool serve`) pulni `pool_low` dan kamayganda limit
+oynasi doirasida `pool_high` gacha to'ldiradi va emaillarni mahalliy
+HTTP yoki Unix-socket API orqali beradi:
+
+    POST /alias           -> {"hme": ..., "label": ..., "reserved_at": ...}  (bo'sh bo'lsa 503)
+    GET  /status          -> pul holati
+
+Har bir email faqat bir marta beriladi: `take` shartli `UPDATE ... WHERE
+assigned_at IS NULL` bilan belgilaydi, shuning uchun bir nechta jarayon
+bitta bazadan olsa ham takrorlanish bo'lmaydi. Bo'sh emaillar xotiradagi
+navbatda turadi - `take` bitta kichik SQLite yozuvidan iborat.
+"""
+
+import sqlite3
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, Optional, Union
+
+from .codec import dumps
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pool (
+    hme         TEXT PRIMARY KEY,
+    label       TEXT NOT NULL DEFAULT '',
+    reserved_at REAL NOT NULL,
+    assigned_at REAL,
+    assignee    TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_pool_free ON pool(reserved_at) WHERE assigned_at IS NULL;
+"""
+
+
+class AliasPool:
+    """Pul jadvali (SQLite) va bo'sh emaillarning xotiradagi navbati"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        # Boshqa jarayon yozayotgan bo'lsa darhol xato bermasdan biroz kutish
+        self.conn.execute("PRAGMA busy_timeout=1000")
+        self.conn.executescript(SCHEMA)
+        self._free: Deque[str] = deque()
+        self.reload()
+
+    def close(self):
+        self.conn.close()
+
+    def reload(self):
+        """Bo'sh emaillar navbatini bazadan qayta o'qiydi (eng eskisi birinchi)"""
+        self._free = deque(row[0] for row in self.conn.execute(
+            "SELECT hme FROM pool WHERE assigned_at IS NULL ORDER BY reserved_at"
+        ))
+
+    def available(self) -> int:
+        return len(self._free)
+
+    def add(self, emails: Iterable[str], label: str = "", when: Optional[float] = None) -> int:
+        """Yangi zaxiralangan emaillarni pulga qo'shadi; qo'shilganlar soni"""
+        now = time.time() if when is None else when
+        added = 0
+        with self.conn:
+            for email in emails:
+                cur = self.conn.execute(
+                    "INSERT OR IGNORE INTO pool(hme, label, reserved_at) VALUES(?, ?, ?)",
+                    (email, label, now),
+                )
+                if cur.rowcount:
+                    self._free.append(email)
+                    added += 1
+        return added
+
+    def take(self, assignee: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Bitta bo'sh emailni atomik belgilaydi va qaytaradi; pul bo'sh bo'lsa None"""
+        while self._free:
+            email = self._free.popleft()
+            now = time.time()
+            with self.conn:
+                cur = self.conn.execute(
+                    "UPDATE pool SET assigned_at = ?, assignee = ? WHERE hme = ? AND assigned_at IS NULL",
+                    (now, assignee, email),
+                )
+                if not cur.rowcount:
+                    continue  # Boshqa jarayon allaqachon olgan
+                label, reserved_at = self.conn.execute(
+                    "SELECT label, reserved_at FROM pool WHERE hme = ?", (email,)
+                ).fetchone()
+            return {"hme": email, "label": label, "reserved_at": reserved_at, "assigned_at": now}
+        return None
+
+    def counts(self) -> Dict[str, int]:
+        free, assigned = self.conn.execute(
+            "SELECT COUNT(*) - COUNT(assigned_at), COUNT(assigned_at) FROM pool"
+        ).fetchone()
+        return {"available": free, "assigned": assigned}
+
+
+class PoolServer:
+    """Pul uchun kichik HTTP API (TCP yoki Unix socket)"""
+
+    def __init__(
+        self,
+        pool: AliasPool,
+        socket_path: Optional[str] = None,
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        on_take: Optional[Callable[[], None]] = None,
+        status: Optional[Callable[[], Dict[str, Any]]] = None,
+    ):
+        self.pool = pool
+        self.socket_path = socket_path
+        self.host = host
+        self.port = port
+        self.on_take = on_take
+        self.status = status
+        self._runner = None
+
+    @property
+    def address(self) -> str:
+        return f"unix:{self.socket_path}" if self.socket_path else f"http://{self.host}:{self.port}"
+
+    @staticmethod
+    def _json(payload: Dict[str, Any], status: int = 200, headers: Optional[Dict[str, str]] = None):
+        from aiohttp import web
+
+        return web.Response(
+            body=dumps(payload),
+            status=status,
+            content_type="application/json",
+            headers=headers,
+        )
+
+    async def _take(self, request):
+        alias = self.pool.take(request.query.get("assignee"))
+        if self.on_take is not None:
+            self.on_take()
+        if alias is None:
+            payload = {"error": "Pul bo'sh, to'ldirilmoqda"}
+            headers = None
+            status = self.status() if self.status is not None else {}
+            if status.get("next_refill"):
+                retry_after = max(1, int(status["next_refill"] - time.time()))
+                headers = {"Retry-After": str(retry_after)}
+                payload["retry_after"] = retry_after
+            return self._json(payload, 503, headers)
+        return self._json(alias)
+
+    async def _status(self, request):
+        status = self.status() if self.status is not None else {}
+        return self._json({**self.pool.counts(), **status})
+
+    async def start(self):
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_post("/alias", self._take)
+        app.router.add_get("/status", self._status)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        if self.socket_path:
+            Path(self.socket_path).unlink(missing_ok=True)  # Oldingi ishga tushirishdan qolgan socket
+            site = web.UnixSite(self._runner, self.socket_path)
+        else:
+            site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+            if self.socket_path:
+                Path(self.socket_path).unlink(missing_ok=True)
@@ -0,0 +1,69 @@
+import asyncio
+import random
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from config.settings import config
+from utils.metrics import record_retry
+from .errors import ErrorKind, classify
+
+RETRYABLE = {ErrorKind.TIMEOUT, ErrorKind.TRANSIENT}
+
+
+class RetryPolicy:
+    """Eksponensial backoff va jitter bilan qayta urinish siyosati.
+
+    Faqat bitta bosqich (masalan, `reserve`) qayta yuboriladi; limit,
+    avtorizatsiya va tuzatib bo'lmaydigan xatolar darhol qaytariladi.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        base_delay: float = 2.0,
+        max_delay: float = 60.0,
+        multiplier: float = 2.0,
+        jitter: float = 0.5,
+    ):
+        self.max_retries = max(0, max_retries)
+        self.base_delay = max(0.0, base_delay)
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = min(max(jitter, 0.0), 1.0)
+
+    @classmethod
+    def from_config(cls) -> "RetryPolicy":
+        return cls(
+            max_retries=config.settings.max_retries,
+            base_delay=config.settings.retry_delay,
+            max_delay=config.settings.retry_max_delay,
+            jitter=config.settings.retry_jitter,
+        )
+
+    def delay(self, attempt: int) -> float:
+        """`attempt`-urinishdan keyingi kutish (0 dan boshlanadi)"""
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** attempt)
+        return delay * (1 - self.jitter) + random.uniform(0, delay * self.jitter)
+
+    async def run(
+        self,
+        call: Callable[[], Awaitable[Dict[str, Any]]],
+        on_retry: Optional[Callable[[int, ErrorKind, Dict[str, Any], float], None]] = None,
+        stage: str = "request",
+    ) -> Tuple[Dict[str, Any], Optional[ErrorKind]]:
+        """`call` ni bajaradi va (javob, xato turi) qaytaradi; muvaffaqiyatda tur None"""
+        attempt = 0
+        while True:
+            res = await call()
+            kind = classify(res)
+            if kind is None or kind not in RETRYABLE or attempt >= self.max_retries:
+                return res, kind
+
+            delay = self.delay(attempt)
+            retry_after = res.get("retry_after") if res else None
+            if retry_after:
+                delay = max(delay, min(float(retry_after), self.max_delay))
+            record_retry(stage, kind.value)
+            if on_retry is not None:
+                on_retry(attempt + 1, kind, res, delay)
+            await asyncio.sleep(delay)
+            attempt += 1
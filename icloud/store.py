@@ -0,0 +1,351 @@
+import re
+import sqlite3
+import time
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Union
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS aliases (
+    anonymous_id TEXT PRIMARY KEY,
+    hme          TEXT NOT NULL UNIQUE,
+    label        TEXT NOT NULL DEFAULT '',
+    note         TEXT NOT NULL DEFAULT '',
+    forward_to   TEXT NOT NULL DEFAULT '',
+    create_ts    INTEGER NOT NULL DEFAULT 0,
+    is_active    INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_aliases_label ON aliases(label);
+CREATE INDEX IF NOT EXISTS idx_aliases_create_ts ON aliases(create_ts);
+CREATE INDEX IF NOT EXISTS idx_aliases_is_active ON aliases(is_active);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+COLUMNS = ("anonymous_id", "hme", "label", "note", "forward_to", "create_ts", "is_active")
+
+
+@lru_cache(maxsize=32)
+def compile_search(pattern: str) -> "re.Pattern":
+    """Yorliq qidiruvi uchun regex (katta-kichik harf farqsiz); noto'g'ri bo'lsa `re.error`"""
+    return re.compile(pattern, re.IGNORECASE)
+
+
+def _row_key(row: Dict[str, Any]) -> tuple:
+    """Server qatorini jadval ustunlari tartibidagi tuple ga aylantiradi"""
+    return (
+        row["anonymousId"],
+        row["hme"],
+        row.get("label") or "",
+        row.get("note") or "",
+        row.get("forwardToEmail") or "",
+        int(row.get("createTimestamp") or 0),
+        1 if row.get("isActive") else 0,
+    )
+
+
+class Alias:
+    """Bitta yashirin email: jadval ustunlari, dict siz.
+
+    `create_ts` - serverdagi kabi millisekundlarda butun son; matn
+    ko'rinishi faqat chiqarishda (`created`) hisoblanadi, shuning uchun
+    filtrdan o'tmagan yoki ko'rsatilmagan qatorlar formatlanmaydi.
+    """
+
+    __slots__ = COLUMNS
+
+    def __init__(
+        self,
+        anonymous_id: str,
+        hme: str,
+        label: str = "",
+        note: str = "",
+        forward_to: str = "",
+        create_ts: int = 0,
+        is_active: bool = True,
+    ):
+        self.anonymous_id = anonymous_id
+        self.hme = hme
+        self.label = label
+        self.note = note
+        self.forward_to = forward_to
+        self.create_ts = create_ts
+        self.is_active = bool(is_active)
+
+    @classmethod
+    def from_server(cls, row: Dict[str, Any]) -> "Alias":
+        """`hmeEmails` qatoridan"""
+        return cls(*_row_key(row))
+
+    def created(self, format_time: Optional[Callable[[int], str]] = None) -> str:
+        """Yaratilgan vaqt matni; `format_time` berilmasa mahalliy vaqt `YYYY-MM-DD HH:MM:SS`"""
+        if format_time is not None:
+            return format_time(self.create_ts)
+        return datetime.fromtimestamp(self.create_ts / 1000).strftime("%Y-%m-%d %H:%M:%S")
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Server formatidagi (hmeEmails kabi) dict - JSON chiqish uchun"""
+        return {
+            "anonymousId": self.anonymous_id,
+            "hme": self.hme,
+            "label": self.label,
+            "note": self.note,
+            "forwardToEmail": self.forward_to,
+            "createTimestamp": self.create_ts,
+            "isActive": self.is_active,
+        }
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Alias):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in COLUMNS)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Alias({self.hme!r}, label={self.label!r}, active={self.is_active})"
+
+
+class SyncStats:
+    __slots__ = ("added", "updated", "removed", "unchanged")
+
+    def __init__(self):
+        self.added = 0
+        self.updated = 0
+        self.removed = 0
+        self.unchanged = 0
+
+    def __repr__(self) -> str:
+        return (f"SyncStats(added={self.added}, updated={self.updated}, "
+                f"removed={self.removed}, unchanged={self.unchanged})")
+
+
+class AliasStore:
+    """Yashirin emaillarning mahalliy SQLite indeksi.
+
+    `anonymousId` va `hme` bo'yicha kalitlangan; yorliq, yaratilgan vaqt va
+    holat bo'yicha indekslar bor. `sync` faqat farqlarni yozadi, ro'yxat va
+    qidiruv esa tarmoqsiz mahalliy so'rov sifatida bajariladi.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        self.conn.execute(
+            "INSERT INTO meta(key, value) VALUES(?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value),
+        )
+
+    @property
+    def last_sync(self) -> float:
+        """Oxirgi muvaffaqiyatli sinxronlash vaqti (unix soniya), hech qachon bo'lmasa 0"""
+        value = self._get_meta("last_sync")
+        return float(value) if value else 0.0
+
+    def is_stale(self, ttl: float) -> bool:
+        return time.time() - self.last_sync >= ttl
+
+    def mark_stale(self):
+        """Keyingi ro'yxat so'rovida serverdan yangilashni majburlaydi"""
+        with self.conn:
+            self._set_meta("last_sync", "0")
+
+    def list_validators(self) -> Dict[str, Any]:
+        """Oxirgi sinxronlashdagi `/list` javobining ETag va Last-Modified qiymatlari"""
+        return {name: self._get_meta(name) for name in ("ETag", "Last-Modified")}
+
+    def touch(self) -> SyncStats:
+        """Server ro'yxat o'zgarmaganini tasdiqladi (304): faqat sinxronlash vaqtini yangilaydi"""
+        with self.conn:
+            self._set_meta("last_sync", repr(time.time()))
+        stats = SyncStats()
+        stats.unchanged = self.count()
+        return stats
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM aliases").fetchone()[0]
+
+    def begin_sync(self) -> "SyncSession":
+        """Qatorlarni birma-bir qabul qiladigan sinxronlash seansini ochadi"""
+        return SyncSession(self)
+
+    def sync(self, rows: Iterable[Dict[str, Any]]) -> SyncStats:
+        """Server ro'yxatini indeksga qo'llaydi, faqat o'zgargan qatorlarni yozadi"""
+        session = self.begin_sync()
+        try:
+            for row in rows:
+                session.feed(row)
+        except BaseException:
+            session.rollback()
+            raise
+        return session.commit()
+
+    def query(
+        self,
+        active: Optional[bool] = None,
+        search: Optional[str] = None,
+    ) -> Iterator[Alias]:
+        """Filtrlangan yozuvlar, yangilari birinchi.
+
+        Holat va tartib SQL da (indekslar bo'yicha), `search` regex i esa bir
+        marta kompilyatsiya qilinib xom ustun qiymatlariga qo'llanadi -
+        `Alias` faqat mos kelgan qatorlar uchun yaratiladi.
+        """
+        pattern = compile_search(search) if search else None
+        where, params = "", ()
+        if active is not None:
+            where, params = "WHERE is_active = ?", (1 if active else 0,)
+        cursor = self.conn.cursor()
+        cursor.row_factory = None  # Oddiy tuple: sqlite3.Row dan arzonroq
+        cursor.execute(f"SELECT {', '.join(COLUMNS)} FROM aliases {where} ORDER BY create_ts DESC", params)
+        if pattern is None:
+            for row in cursor:
+                yield Alias(*row)
+        else:
+            match = pattern.search
+            label = COLUMNS.index("label")
+            for row in cursor:
+                if match(row[label]) is not None:
+                    yield Alias(*row)
+
+    def update(self, anonymous_id: str, **fields: Any):
+        """Serverda o'zgartirilgan qatorni indeksda ham yangilaydi (label, note, is_active)"""
+        unknown = set(fields) - {"label", "note", "is_active"}
+        if unknown:
+            raise ValueError(f"Noma'lum ustun(lar): {', '.join(sorted(unknown))}")
+        if not fields:
+            return
+        if "is_active" in fields:
+            fields["is_active"] = 1 if fields["is_active"] else 0
+        assignments = ", ".join(f"{col} = ?" for col in fields)
+        with self.conn:
+            self.conn.execute(
+                f"UPDATE aliases SET {assignments} WHERE anonymous_id = ?",
+                (*fields.values(), anonymous_id),
+            )
+
+    def delete(self, anonymous_id: str):
+        with self.conn:
+            self.conn.execute("DELETE FROM aliases WHERE anonymous_id = ?", (anonymous_id,))
+
+    def contains(self, hme: str) -> bool:
+        return self.conn.execute("SELECT 1 FROM aliases WHERE hme = ?", (hme,)).fetchone() is not None
+
+
+class SyncSession:
+    """Bitta sinxronlash tranzaksiyasi.
+
+    Server qatorlari `feed` orqali kelish tartibida beriladi va
+    `FLUSH_SIZE` lik bo'laklarda solishtirilib yoziladi: xotirada faqat
+    joriy bo'lak turadi. Ko'rilgan `anonymousId` lar vaqtinchalik jadvalga
+    yoziladi, `commit` esa serverda qolmagan qatorlarni bitta so'rov bilan
+    o'chiradi.
+    """
+
+    FLUSH_SIZE = 500
+
+    def __init__(self, store: AliasStore):
+        self.store = store
+        self.conn = store.conn
+        self.stats = SyncStats()
+        self._pending: Dict[str, tuple] = {}
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS sync_seen (anonymous_id TEXT PRIMARY KEY)")
+        self.conn.execute("DELETE FROM temp.sync_seen")
+
+    def feed(self, row: Dict[str, Any]):
+        key = _row_key(row)
+        self._pending[key[0]] = key
+        if len(self._pending) >= self.FLUSH_SIZE:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        pending = self._pending
+        self._pending = {}
+        ids = list(pending)
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO temp.sync_seen(anonymous_id) VALUES(?)", ((anonymous_id,) for anonymous_id in ids)
+        )
+        existing = {
+            row[0]: tuple(row)
+            for row in self.conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM aliases WHERE anonymous_id IN ({', '.join('?' for _ in ids)})",
+                ids,
+            )
+        }
+        changed = []
+        for anonymous_id, key in pending.items():
+            old = existing.get(anonymous_id)
+            if old is None:
+                self.stats.added += 1
+                changed.append(key)
+            elif old != key:
+                self.stats.updated += 1
+                changed.append(key)
+            else:
+                self.stats.unchanged += 1
+        if not changed:
+            return
+        placeholders = ", ".join("?" for _ in COLUMNS)
+        updates = ", ".join(f"{col} = excluded.{col}" for col in COLUMNS[1:])
+        # hme boshqa anonymousId bilan qaytgan bo'lsa UNIQUE to'qnashmasligi uchun eski qator o'chiriladi.
+        # Oqimda hali ko'rilmagan bunday qatorlar "removed" ga kiradi; `commit` ularni qayta sanamaydi
+        hmes = [key[1] for key in changed]
+        self.stats.removed += self.conn.execute(
+            f"SELECT COUNT(*) FROM aliases WHERE hme IN ({', '.join('?' for _ in hmes)}) "
+            "AND anonymous_id NOT IN (SELECT anonymous_id FROM temp.sync_seen)",
+            hmes,
+        ).fetchone()[0]
+        self.conn.executemany(
+            "DELETE FROM aliases WHERE hme = ? AND anonymous_id != ?",
+            ((key[1], key[0]) for key in changed),
+        )
+        self.conn.executemany(
+            f"INSERT INTO aliases({', '.join(COLUMNS)}) VALUES({placeholders}) "
+            f"ON CONFLICT(anonymous_id) DO UPDATE SET {updates}",
+            changed,
+        )
+
+    def commit(self, validators: Optional[Dict[str, Any]] = None) -> SyncStats:
+        """Yozuvlarni saqlaydi; `validators` keyingi shartli so'rov uchun eslab qolinadi"""
+        try:
+            self._flush()
+            cur = self.conn.execute(
+                "DELETE FROM aliases WHERE anonymous_id NOT IN (SELECT anonymous_id FROM temp.sync_seen)"
+            )
+            self.stats.removed += cur.rowcount
+            self.conn.execute("DELETE FROM temp.sync_seen")
+            self.store._set_meta("last_sync", repr(time.time()))
+            for name in ("ETag", "Last-Modified"):
+                value = (validators or {}).get(name)
+                if value:
+                    self.store._set_meta(name, value)
+                else:
+                    self.conn.execute("DELETE FROM meta WHERE key = ?", (name,))
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+        return self.stats
+
+    def rollback(self):
+        self._pending = {}
+        self.conn.rollback()
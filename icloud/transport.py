@@ -0,0 +1,169 @@
+import asyncio
+import ssl
+from functools import lru_cache
+from typing import Dict, Optional
+
+import aiohttp
+import certifi
+
+from config.settings import config
+from utils.metrics import Gauge, registry
+
+
+@lru_cache(maxsize=1)
+def ssl_context() -> ssl.SSLContext:
+    """certifi sertifikatlari bilan SSL konteksti (jarayon bo'yicha bitta marta quriladi)"""
+    return ssl.create_default_context(cafile=certifi.where())
+
+
+class TransportStats:
+    __slots__ = ("requests", "connections_created", "connections_reused", "dns_cache_hits", "dns_cache_misses")
+
+    # Prometheus uchun tavsiflar (`hme_transport_<nom>` gauge lari)
+    HELP = {
+        "requests": "Umumiy transport orqali yuborilgan HTTP so'rovlar",
+        "connections_created": "Ochilgan yangi TCP/TLS ulanishlar",
+        "connections_reused": "Puldan qayta ishlatilgan ulanishlar",
+        "dns_cache_hits": "DNS keshidan topilgan nomlar",
+        "dns_cache_misses": "DNS keshida topilmagan nomlar",
+    }
+
+    def __init__(self):
+        self.requests = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.dns_cache_hits = 0
+        self.dns_cache_misses = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Transport:
+    """`HideMyEmail` sessiyalari uchun umumiy HTTP transport.
+
+    Bitta `TCPConnector` (ulanishlar puli, DNS keshi, keep-alive) va
+    keshlangan SSL konteksti barcha nusxalar orasida bo'lishiladi, shuning
+    uchun har bir nusxa yangi ulanish va handshake ochmaydi.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 10,
+        dns_cache_ttl: int = 300,
+        keepalive_timeout: float = 30.0,
+        connect_timeout: float = 10.0,
+        read_timeout: float = 10.0,
+        request_timeout: float = 60.0,
+    ):
+        self.pool_size = pool_size
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = aiohttp.ClientTimeout(
+            total=request_timeout or None,
+            sock_connect=connect_timeout or None,
+            sock_read=read_timeout or None,
+        )
+        self.stats = TransportStats()
+        self._connector: Optional[aiohttp.TCPConnector] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._users = 0
+
+    @classmethod
+    def from_config(cls) -> "Transport":
+        return cls(
+            pool_size=config.settings.pool_size,
+            dns_cache_ttl=config.settings.dns_cache_ttl,
+            keepalive_timeout=config.settings.keepalive_timeout,
+            connect_timeout=config.settings.connect_timeout,
+            read_timeout=config.settings.read_timeout,
+            request_timeout=config.settings.request_timeout,
+        )
+
+    @property
+    def closed(self) -> bool:
+        return self._connector is None or self._connector.closed
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        stats = self.stats
+
+        async def on_request_start(session, ctx, params):
+            stats.requests += 1
+
+        async def on_connection_create_end(session, ctx, params):
+            stats.connections_created += 1
+
+        async def on_connection_reuseconn(session, ctx, params):
+            stats.connections_reused += 1
+
+        async def on_dns_cache_hit(session, ctx, params):
+            stats.dns_cache_hits += 1
+
+        async def on_dns_cache_miss(session, ctx, params):
+            stats.dns_cache_misses += 1
+
+        trace = aiohttp.TraceConfig()
+        trace.on_request_start.append(on_request_start)
+        trace.on_connection_create_end.append(on_connection_create_end)
+        trace.on_connection_reuseconn.append(on_connection_reuseconn)
+        trace.on_dns_cache_hit.append(on_dns_cache_hit)
+        trace.on_dns_cache_miss.append(on_dns_cache_miss)
+        return trace
+
+    def _get_connector(self) -> aiohttp.TCPConnector:
+        loop = asyncio.get_running_loop()
+        if self.closed or self._loop is not loop:
+            self._connector = aiohttp.TCPConnector(
+                ssl=ssl_context(),
+                limit=self.pool_size,
+                use_dns_cache=True,
+                ttl_dns_cache=self.dns_cache_ttl,
+                keepalive_timeout=self.keepalive_timeout,
+                enable_cleanup_closed=True,
+            )
+            self._loop = loop
+            self._users = 0
+        return self._connector
+
+    def session(self, headers: Dict[str, str]) -> aiohttp.ClientSession:
+        """Umumiy connector ustida yangi sessiya; yopilganda `release` chaqirilishi kerak"""
+        connector = self._get_connector()
+        self._users += 1
+        return aiohttp.ClientSession(
+            headers=headers,
+            timeout=self.timeout,
+            connector=connector,
+            connector_owner=False,
+            trace_configs=[self._trace_config()],
+        )
+
+    async def release(self):
+        """Sessiyadan foydalanuvchi chiqdi; oxirgisi chiqqanda connector yopiladi"""
+        self._users = max(0, self._users - 1)
+        if self._users == 0 and not self.closed:
+            await self._connector.close()
+
+    async def close(self):
+        if not self.closed:
+            await self._connector.close()
+        self._users = 0
+
+
+_shared: Optional[Transport] = None
+
+
+def get_transport() -> Transport:
+    """Jarayon bo'yicha umumiy transport"""
+    global _shared
+    if _shared is None:
+        _shared = Transport.from_config()
+    return _shared
+
+
+for _name in TransportStats.__slots__:
+    registry.register(Gauge(
+        f"hme_transport_{_name}",
+        TransportStats.HELP[_name],
+        lambda name=_name: getattr(get_transport().stats, name),
+    ))
+del _name
@@ -1,26 +1,59 @@
 import asyncio
-import re
+import sqlite3
+import argparse
 import threading
+import time
+from contextlib import ExitStack, contextmanager
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Union
+from typing import Callable, Iterator, List, Dict, Any, Optional, Union
 from pathlib import Path
 
 from rich.console import Console
-from rich.table import Table
 from rich.progress import Progress, BarColumn, TimeRemainingColumn
-from rich.prompt import IntPrompt, Confirm
+from rich.prompt import IntPrompt, Confirm, Prompt
 
-from icloud import HideMyEmail
+from icloud import HideMyEmail, AliasStore, HideMyEmailError
+from icloud.bulk import ACTIONS as BULK_ACTIONS, BulkOperation, BulkResult, summarize, write_report
+from icloud.cookies import CookieJar, load_cookie_jar
+from icloud.pool import AliasPool, PoolServer
+from icloud.errors import ErrorKind, classify, error_message
+from icloud.retry import RetryPolicy
 from utils.logger import logger
 from utils.helpers import TimeHelper
-from config.settings import config
+from utils.scheduler import QuotaScheduler
+from utils.journal import ReservationJournal
+from utils.archive import AliasArchive
+from utils.metrics import MetricsExporter, record_list_sync, record_reserved
+from utils.render import make_renderer
+from utils.export import Exporter
+from utils import profiling
+from config.settings import RELOADABLE, SettingsError, config
 
 class RichHideMyEmail(HideMyEmail):
-    def __init__(self):
+    # Sessiya eskirganda cookie.txt o'zgarganini tekshirish oralig'i (soniyalarda)
+    COOKIE_POLL_INTERVAL = 5.0
+    # Ketma-ket shuncha partiya bironta ham email bermasa jarayon to'xtatiladi
+    MAX_EMPTY_BATCHES = 5
+
+    def __init__(self, console: Optional[Console] = None):
         super().__init__()
-        self.console = Console()
+        self.console = console or Console()
         self.time_helper = TimeHelper()
         self.print_lock = threading.Lock()
+        self._alias_store: Optional[AliasStore] = None
+        self._quota_reached = False
+        self._auth_failed = False
+        self._fatal_error = False
+        self.retry_policy = RetryPolicy.from_config()
+        self._scheduler: Optional[QuotaScheduler] = None
+        self._journal: Optional[ReservationJournal] = None
+        self.cookie_jar = CookieJar()
+        self.metrics_exporter = MetricsExporter(
+            path=config.settings.metrics_file or None,
+            port=config.settings.metrics_port,
+            host=config.settings.metrics_host,
+            interval=config.settings.metrics_interval,
+        )
         self._load_cookies()
         self._setup_directories()
 
@@ -28,236 +61,734 @@ class RichHideMyEmail(HideMyEmail):
         """Hozirgi vaqtni formatlangan holda qaytaradi"""
         return datetime.now().strftime("%m/%d/%y %H:%M:%S MSK")
 
+    @contextmanager
+    def _console(self) -> Iterator[Console]:
+        """`print_lock` ostida konsol; profil rejimida navbat kutish va chiqarish vaqti o'lchanadi"""
+        started = time.perf_counter()
+        with self.print_lock:
+            profiling.record("print_lock_wait", time.perf_counter() - started)
+            with profiling.stage("render"):
+                yield self.console
+
     def _print_with_timestamp(self, *args, **kwargs):
         """Vaqt logosi bilan chiqarish"""
         timestamp = f"[bold cyan][  {self._get_current_time()}  ][/] [bold white]|[/]"
-        with self.print_lock:
-            self.console.print(timestamp, *args, **kwargs)
+        with self._console() as console:
+            console.print(timestamp, *args, **kwargs)
 
     def _print_progress(self, *args, **kwargs):
         """Progress bar uchun alohida chiqarish"""
-        with self.print_lock:
-            self.console.print(*args, **kwargs)
+        with self._console() as console:
+            console.print(*args, **kwargs)
 
     def _setup_directories(self):
         try:
-            backup_dir = Path(config.get("DEFAULT", "backup_dir"))
+            backup_dir = Path(config.settings.backup_dir)
             backup_dir.mkdir(exist_ok=True)
             self._print_with_timestamp("[green]✓[/] Backups papkasi yaratildi")
         except Exception as e:
             self._print_with_timestamp(f"[red]✗ Xato:[/] {str(e)}")
 
     def _load_cookies(self):
-        cookie_file = Path(config.get("DEFAULT", "cookie_file"))
+        cookie_file = Path(config.settings.cookie_file)
         try:
             if cookie_file.exists():
-                with open(cookie_file, "r", encoding="utf-8") as f:
-                    cookies = [line.strip() for line in f if line.strip()]
-                    if cookies:
-                        self.cookies = cookies[0]
-                        self._print_with_timestamp("[green]✓[/] Cookie faylidan ma'lumotlar yuklandi")
-                    else:
-                        self._print_with_timestamp('[yellow][!] Cookie fayli bo\'sh')
+                jar = load_cookie_jar(cookie_file)
+                self.cookie_jar = jar
+                if jar:
+                    self.cookies = jar.header()
+                    self._print_with_timestamp(
+                        f"[green]✓[/] Cookie faylidan ma'lumotlar yuklandi [dim]({len(jar)} ta cookie)[/]"
+                    )
+                else:
+                    self._print_with_timestamp('[yellow][!] Cookie fayli bo\'sh')
             else:
                 self._print_with_timestamp('[yellow][!] Cookie fayli topilmadi')
         except Exception as e:
             self._print_with_timestamp(f'[red]✗ Xato:[/] {str(e)}')
 
-    async def _generate_one(self, retry_count: int = 0) -> Union[str, None]:
-        """Bitta email generatsiya qilish va zaxiralash"""
+    def _cookie_file_changed(self) -> bool:
+        try:
+            mtime = Path(config.settings.cookie_file).stat().st_mtime
+        except OSError:
+            return False
+        return mtime != self.cookie_jar.mtime
+
+    def _format_expiry(self) -> str:
+        left = self.cookie_jar.expires_in()
+        if left is None:
+            return "muddati noma'lum"
+        at = datetime.fromtimestamp(self.cookie_jar.expires_at).strftime("%m/%d %H:%M")
+        if left <= 0:
+            return f"muddati {at} da tugagan"
+        hours, minutes, _ = self.time_helper.format_seconds(int(left))
+        return f"{at} gacha, ~{hours:02d}:{minutes:02d} qoldi"
+
+    def session_expiring(self, within: Optional[float] = None) -> bool:
+        """Cookie muddati `within` (standart: cookie_expiry_margin) soniya ichida tugaydimi"""
+        left = self.cookie_jar.expires_in()
+        margin = config.settings.cookie_expiry_margin if within is None else within
+        return left is not None and left < margin
+
+    async def preflight(self) -> bool:
+        """Uzoq jarayondan oldin cookie va sessiyani tekshiradi.
+
+        Cookie yo'q, muddati tugagan yoki server sessiyani rad etsa False
+        qaytaradi (`auth_failed` o'rnatiladi). Tarmoq xatosida tekshiruv
+        o'tkazib yuboriladi - qayta urinishlar buni hal qiladi.
+        """
+        jar = self.cookie_jar
+        if not jar:
+            self._auth_failed = True
+            self._print_with_timestamp(f"[red]✗ Cookie topilmadi:[/] {config.settings.cookie_file} ni to'ldiring")
+            return False
+        if self.session_expiring(within=0):
+            self._auth_failed = True
+            self._print_with_timestamp(f"[red]✗ Cookie eskirgan:[/] {self._format_expiry()}, cookie.txt ni yangilang")
+            return False
+        if jar.missing:
+            self._print_with_timestamp(f"[yellow][!] Cookie faylida yo'q:[/] {', '.join(jar.missing)}")
+
+        res = await self.validate_session()
+        kind = classify(res)
+        if kind is ErrorKind.AUTH:
+            self._handle_failure(kind, res)
+            return False
+        if kind is not None:
+            self._print_with_timestamp(
+                f"[yellow][!] Sessiyani tekshirib bo'lmadi:[/] {error_message(res)} [dim](davom etiladi)[/]"
+            )
+            return True
+        self._auth_failed = False
+        self._print_with_timestamp(f"[green]✓[/] Sessiya yaroqli [dim]({self._format_expiry()})[/]")
+        return True
+
+    async def wait_for_cookies(self, reason: str, on_wait: Optional[Callable[[str], None]] = None):
+        """Rejalashtiruvchini to'xtatib, cookie.txt yangilanib sessiya tasdiqlanguncha kutadi"""
+        self._print_with_timestamp(
+            f"[yellow]⏸ Generatsiya to'xtatildi:[/] {reason}. "
+            f"[bold]{config.settings.cookie_file}[/] yangilanishi kutilmoqda"
+        )
+        if on_wait is not None:
+            on_wait("[bold yellow][Cookie yangilanishi kutilmoqda][/]")
+        while True:
+            await asyncio.sleep(self.COOKIE_POLL_INTERVAL)
+            self._reload_settings()
+            if not self._cookie_file_changed():
+                continue
+            self._load_cookies()
+            if self.session_expiring():
+                self._print_with_timestamp(f"[yellow][!] Yangi cookie ham tez orada tugaydi:[/] {self._format_expiry()}")
+                continue
+            if await self.preflight():
+                self._print_with_timestamp("[green]▶ Generatsiya davom etmoqda[/]")
+                return
+
+    def _reload_settings(self):
+        """config.ini o'zgargan bo'lsa yangi qiymatlarni ishlayotgan jarayonga qo'llaydi"""
+        try:
+            changes = config.reload()
+        except SettingsError as e:
+            self._print_with_timestamp(f"[red]✗ config.ini qabul qilinmadi:[/] {e} [dim](oldingi sozlamalar qoldi)[/]")
+            return
+        if not changes:
+            return
+        settings = config.settings
+        self.label = settings.label
+        self.retry_policy = RetryPolicy.from_config()
+        if self._scheduler is not None:
+            self._scheduler.configure(settings.delay_hours * 3600, settings.quota_per_window)
+        for key, (old, new) in changes.items():
+            note = "" if key in RELOADABLE else " [dim](qayta ishga tushirilgach)[/]"
+            self._print_with_timestamp(f"[cyan]⚙ Sozlama o'zgardi:[/] {key}: {old} → {new}{note}")
+
+    @property
+    def _batch_halted(self) -> bool:
+        """Partiyadagi qolgan vazifalar boshlanmasligi kerakmi (limit, avtorizatsiya yoki tuzatib bo'lmas xato)"""
+        return self._quota_reached or self._auth_failed or self._fatal_error
+
+    def _empty_batch_delay(self, empty: int) -> float:
+        """Ketma-ket `empty`-bo'sh partiyadan keyingi kutish: eksponensial, limit oynasidan oshmaydi"""
+        return min(config.settings.retry_delay * 2 ** (empty - 1), self.scheduler.window)
+
+    @property
+    def auth_failed(self) -> bool:
+        """Oxirgi jarayon avtorizatsiya xatosi bilan to'xtaganmi"""
+        return self._auth_failed
+
+    def _on_retry(self, stage: str):
+        def report(attempt: int, kind: ErrorKind, res: Dict[str, Any], delay: float):
+            self._print_with_timestamp(
+                f"[yellow]↻ Qayta urinish {attempt}/{self.retry_policy.max_retries}[/] "
+                f"({stage}: {error_message(res)}) [dim]{delay:.1f} soniyadan keyin[/]"
+            )
+        return report
+
+    def _handle_failure(self, kind: ErrorKind, res: Dict[str, Any]):
+        """Yakuniy xatoni turiga qarab qayta ishlash"""
+        if kind is ErrorKind.QUOTA:
+            self._quota_reached = True
+            self._print_with_timestamp("[yellow]⚠️ Ogohlantirish:[/] 5 talik limitga yetdingiz [bold cyan](kuting ...)[/]")
+        elif kind is ErrorKind.AUTH:
+            self._auth_failed = True
+            self._print_with_timestamp("[red]✗ Avtorizatsiya xatosi:[/] cookie eskirgan yoki yaroqsiz, cookie.txt ni yangilang")
+        elif kind is ErrorKind.TIMEOUT:
+            self._print_with_timestamp("[red]✗ Xato:[/] So'rov vaqti tugadi (urinishlar tugadi)")
+        else:
+            if kind is ErrorKind.FATAL:
+                # Qayta urinish yordam bermaydigan xato: API ni behuda urmaslik uchun partiya to'xtaydi
+                self._fatal_error = True
+            self._print_with_timestamp(f"[red]✗ Xato:[/] {error_message(res)}")
+
+    async def _generate_one(self) -> Union[str, None]:
+        """Bitta email generatsiya qilish va zaxiralash.
+
+        Har bir bosqich alohida qayta uriniladi: zaxiralash muvaffaqiyatsiz
+        bo'lsa, yangi email generatsiya qilinmaydi, shu `hme` qayta yuboriladi.
+        """
         try:
             # Email generatsiya qilish
-            gen_res = await self.generate_email()
-            
-            # Server javobini tekshirish
-            if not gen_res or not gen_res.get("success"):
-                error = gen_res.get("error", {}) if gen_res else {}
-                err_msg = error.get("errorMessage", "Noma'lum xato")
-                
-                # Limit xatosini aniqlash
-                if any(keyword in err_msg.lower() for keyword in ["limit", "maximum", "5 per hour", "too many"]):
-                    self._print_with_timestamp("[yellow]⚠️ Ogohlantirish:[/] 5 talik limitga yetdingiz [bold cyan](kuting ...)[/]")
-                    return None
-                
-                self._print_with_timestamp(f"[red]✗ Xato:[/] {err_msg}")
-                if retry_count < config.getint("DEFAULT", "max_retries"):
-                    await asyncio.sleep(config.getint("DEFAULT", "retry_delay"))
-                    return await self._generate_one(retry_count + 1)
+            with profiling.stage("generate"):
+                gen_res, kind = await self.retry_policy.run(
+                    self.generate_email, self._on_retry("generatsiya"), stage="generate"
+                )
+            if kind is not None:
+                self._handle_failure(kind, gen_res)
                 return None
 
-            email = gen_res["result"]["hme"]
+            email = gen_res.result["hme"]
             self._print_with_timestamp(f"[bold green]✓[/] [bold blue]Pochta generatsiya qilindi:[/] {email}")
 
             # Emailni zaxiralash
-            reserve_res = await self.reserve_email(email)
-            
-            # Zaxiralash javobini tekshirish
-            if not reserve_res or not reserve_res.get("success"):
-                error = reserve_res.get("error", {}) if reserve_res else {}
-                err_msg = error.get("errorMessage", "Noma'lum xato")
-                
-                # Limit xatosini aniqlash
-                if any(keyword in err_msg.lower() for keyword in ["limit", "maximum", "5 per hour", "too many"]):
-                    self._print_with_timestamp("[yellow]⚠️ Ogohlantirish:[/] 5 talik limitga yetdingiz [bold cyan](kuting ...)[/]")
-                    return None
-                
-                self._print_with_timestamp(f"[red]✗ Xato:[/] {err_msg}")
-                if retry_count < config.getint("DEFAULT", "max_retries"):
-                    await asyncio.sleep(config.getint("DEFAULT", "retry_delay"))
-                    return await self._generate_one(retry_count + 1)
+            with profiling.stage("reserve"):
+                reserve_res, kind = await self.retry_policy.run(
+                    lambda: self.reserve_email(email), self._on_retry("zaxiralash"), stage="reserve"
+                )
+            if kind is not None:
+                self._handle_failure(kind, reserve_res)
                 return None
 
+            record_reserved()
+
             self._print_with_timestamp(f"[bold green]✓✓[/] [bold blue]Pochta zaxiralandi:[/] {email}")
             return email
             
         except Exception as e:
             self._print_with_timestamp(f"[red]✗ Xato:[/] {str(e)}")
-            if retry_count < config.getint("DEFAULT", "max_retries"):
-                await asyncio.sleep(config.getint("DEFAULT", "retry_delay"))
-                return await self._generate_one(retry_count + 1)
             return None
 
-    async def _generate_batch(self, batch_size: int, progress: Progress, task_id: int) -> List[str]:
-        emails = []
-        for _ in range(batch_size):
-            email = await self._generate_one()
-            if email:
-                emails.append(email)
-                progress.update(task_id, advance=1)
-            await asyncio.sleep(config.getint("DEFAULT", "time_between_accounts"))
-        return emails
+    async def _generate_batch(
+        self,
+        batch_size: int,
+        progress: Optional[Progress] = None,
+        task_id: Optional[int] = None,
+        on_reserved: Optional[Callable[[str], None]] = None,
+    ) -> List[str]:
+        """Partiyani `max_concurrent_tasks` tagacha parallel generatsiya qilish.
+
+        Natijalar yuborilish tartibida qaytariladi; limit yoki avtorizatsiya
+        xatosi kelsa qolgan vazifalar boshlanmaydi. `on_reserved` har bir
+        email zaxiralanib jurnalga yozilishi bilan chaqiriladi.
+        """
+        concurrency = max(1, min(config.settings.max_concurrent_tasks, batch_size))
+        pause = config.settings.time_between_accounts
+        semaphore = asyncio.Semaphore(concurrency)
+        results: List[Optional[str]] = [None] * batch_size
+        self._quota_reached = False
+        self._auth_failed = False
+        self._fatal_error = False
+
+        async def worker(slot: int):
+            async with semaphore:
+                if self._batch_halted:
+                    return
+                with profiling.stage("generate_one"):
+                    email = await self._generate_one()
+                if email:
+                    results[slot] = email
+                    with profiling.stage("journal"):
+                        self.journal.append(email, label=self.label)
+                    self.scheduler.record()
+                    # Uzoq ish davomida olingan ro'yxat ham yangi emaillarni ko'rsatsin
+                    self.alias_store.mark_stale()
+                    if on_reserved is not None:
+                        on_reserved(email)
+                    if progress is not None:
+                        progress.update(task_id, advance=1, refresh=True)
+                if not (self._batch_halted):
+                    await asyncio.sleep(pause)
 
-    async def _save_emails_to_file(self, emails: List[str]) -> bool:
-        if not emails:
-            self._print_with_timestamp("[yellow][!] Saqlanadigan email yo'q")
+        await asyncio.gather(*(worker(slot) for slot in range(batch_size)))
+        return [email for email in results if email]
+
+    @property
+    def journal(self) -> ReservationJournal:
+        """Zaxiralar jurnali (birinchi murojaatda ochiladi)"""
+        if self._journal is None:
+            self._journal = ReservationJournal(
+                config.settings.journal_file,
+                fsync_interval=config.settings.journal_fsync_interval,
+            )
+        return self._journal
+
+    def _journal_failed(self) -> bool:
+        """Jurnal xatosini ko'rsatadi va tozalaydi; xato bo'lgan bo'lsa True"""
+        if self._journal is None or self._journal.error is None:
             return False
-        
+        error, self._journal.error = self._journal.error, None
+        self._print_with_timestamp(f"[red][!] Jurnal diskka yozilmadi:[/] {error}")
+        return True
+
+    async def _sync_journal(self):
+        try:
+            await self.journal.sync()
+        except OSError:
+            self._journal_failed()
+
+    def save_emails_file(self) -> int:
+        """`generated_emails.txt` ni jurnaldan qayta quradi (atomik almashtirish bilan)"""
         try:
-            emails_file = Path(config.get("DEFAULT", "generated_emails_file"))
-            if emails_file.exists():
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                backup_path = Path(config.get("DEFAULT", "backup_dir")) / f"generated_emails_{timestamp}.bak"
-                emails_file.rename(backup_path)
-
-            with open(emails_file, "w", encoding="utf-8") as f:
-                f.write("\n".join(emails))
+            emails_file = config.settings.generated_emails_file
+            count = ReservationJournal.rebuild(config.settings.journal_file, emails_file)
+            if not count:
+                self._print_with_timestamp("[yellow][!] Saqlanadigan email yo'q")
+                return 0
             
-            self._print_with_timestamp(f'[green]✓[/] {len(emails)} ta email saqlandi')
-            return True
+            self._print_with_timestamp(f'[green]✓[/] {count} ta email {emails_file} fayliga saqlandi')
+            return count
         except Exception as e:
             self._print_with_timestamp(f'[red]✗ Xato:[/] {str(e)}')
-            return False
+            return 0
+
+    def compact_archive(self, prune_days: Optional[float] = None) -> Optional[Dict[str, int]]:
+        """Eski .bak zaxiralar, generated_emails.txt va jurnalni arxivga birlashtiradi"""
+        try:
+            archive = AliasArchive(config.settings.archive_file)
+            try:
+                stats = archive.compact(
+                    config.settings.backup_dir,
+                    emails_file=config.settings.generated_emails_file,
+                    journal_file=config.settings.journal_file,
+                    prune_days=prune_days,
+                )
+                total = len(archive)
+            finally:
+                archive.close()
+        except (OSError, sqlite3.Error) as e:
+            self._print_with_timestamp(f"[red]✗ Xato:[/] {str(e)}")
+            return None
+        self._print_with_timestamp(
+            f"[green]✓[/] Arxiv: +{stats.added} yangi, {stats.duplicates} takroriy, "
+            f"{stats.scanned} fayl o'qildi, {stats.skipped} o'zgarmagan"
+            + (f", {stats.pruned} eski zaxira o'chirildi" if stats.pruned else "")
+            + f" [dim](jami {total} ta)[/]"
+        )
+        return {**stats.as_dict(), "total": total}
+
+    async def reconcile_archive(self, refresh: bool = False, adopt: bool = False) -> Optional[Dict[str, Any]]:
+        """Arxivni serverdagi ro'yxat bilan solishtiradi"""
+        if not await self.sync_aliases(force=refresh) and not self.alias_store.last_sync:
+            return None
+        archive = AliasArchive(config.settings.archive_file)
+        try:
+            report = archive.reconcile(self.alias_store.query(), adopt=adopt)
+        finally:
+            archive.close()
+        self._print_with_timestamp(
+            f"[green]✓[/] Solishtirish: {report.matched} ta mos, "
+            f"{len(report.live_only)} ta faqat serverda, {len(report.archive_only)} ta faqat arxivda"
+            + (f", {report.adopted} ta arxivga qo'shildi" if report.adopted else "")
+        )
+        return report.as_dict()
+
+    @property
+    def scheduler(self) -> QuotaScheduler:
+        """Limit oynasi rejalashtiruvchisi (holati faylda saqlanadi)"""
+        if self._scheduler is None:
+            self._scheduler = QuotaScheduler(
+                config.settings.schedule_state_file,
+                window_seconds=config.settings.delay_hours * 3600,
+                quota=config.settings.quota_per_window,
+            )
+        return self._scheduler
+
+    def _show_wait(self, progress: Progress, task_id: int, target: float, remaining: float):
+        # Uzoq kutish paytida ham delay_hours/quota_per_window o'zgarishlari qo'llanadi
+        self._reload_settings()
+        hours, minutes, _ = self.time_helper.format_seconds(int(remaining))
+        at = datetime.fromtimestamp(target).strftime("%H:%M:%S")
+        progress.update(
+            task_id,
+            description=f"[bold cyan][Keyingi partiya:[/] [bold yellow]{at}[/] [bold cyan](~{hours:02d}:{minutes:02d} qoldi) ][/]",
+            refresh=True,
+        )
+
+    async def generate_with_schedule(self, total_count: int, batch_size: int, resume: bool = False) -> List[str]:
+        # Eskirgan sessiya bilan limit oynalarini behuda kutmaslik uchun avval tekshiruv
+        if not await self.preflight():
+            self._print_with_timestamp("[red]Jarayon boshlanmadi.[/] Cookie yangilangach qayta urinib ko'ring")
+            return []
+        scheduler = self.scheduler
+        done = 0
+        pending = scheduler.pending_run() if resume else None
+        if pending:
+            total_count, batch_size, done = pending["total"], pending["batch"], pending["done"]
+            self._print_with_timestamp(f"[bold]Jarayon davom ettirilmoqda:[/] {done}/{total_count} ta email")
+        else:
+            scheduler.start_run(total_count, batch_size)
 
-    async def generate_with_schedule(self, total_count: int, batch_size: int) -> List[str]:
         emails = []
-        remaining = total_count
+        remaining = total_count - done
+        empty = 0
+        self.journal.start()
+        loading = "[cyan]============Yuklanmoqda============"
         
         with Progress(
             "[progress.description]{task.description}",
             "[progress.percentage]",
             console=self.console,
-            transient=True
+            transient=True,
+            auto_refresh=False
         ) as progress:
-            task = progress.add_task("[cyan]============Yuklanmoqda============", total=total_count)
+            task = progress.add_task(loading, total=total_count, completed=done)
             
             while remaining > 0:
-                current_batch = min(batch_size, remaining)
+                self._reload_settings()
+                if not scheduler.available():
+                    if self.session_expiring(within=scheduler.next_slot() - time.time() + config.settings.cookie_expiry_margin):
+                        self._print_with_timestamp(
+                            f"[yellow][!] Cookie keyingi partiyagacha eskiradi[/] ({self._format_expiry()}): "
+                            f"cookie.txt ni oldindan yangilang"
+                        )
+                    await scheduler.wait(lambda target, left: self._show_wait(progress, task, target, left))
+                    progress.update(task, description=loading, refresh=True)
+                    continue  # kutish paytida o'zgargan sozlamalarni qayta tekshirish
+
+                if self.session_expiring():
+                    await self.wait_for_cookies(
+                        f"cookie {self._format_expiry()}",
+                        lambda text: progress.update(task, description=text, refresh=True),
+                    )
+                    progress.update(task, description=loading, refresh=True)
+                    continue
+
+                current_batch = min(batch_size, remaining, scheduler.available())
                 self._print_with_timestamp(f"[bold]Jarayonda:[/] {current_batch} ta email")
                 
                 batch = await self._generate_batch(current_batch, progress, task)
                 emails.extend(batch)
                 remaining -= len(batch)
 
-                progress.update(task, completed=total_count - remaining)
-                
-                if remaining > 0:
-                    delay = config.getint("DEFAULT", "delay_hours")
-                    delay_seconds = delay * 3600
-                    while delay_seconds > 0:
-                        hours, minutes, seconds = self.time_helper.format_seconds(delay_seconds)
-                        progress.update(
-                            task,
-                            description=f"[bold cyan][Keyingi partiya uchun kutish:[/] [bold yellow]{hours:02d}:{minutes:02d}:{seconds:02d}[/] [bold cyan]... ][/]"
+                scheduler.update_run(total_count - remaining)
+                progress.update(task, completed=total_count - remaining, refresh=True)
+
+                if self._auth_failed:
+                    self._print_with_timestamp("[red]Jarayon to'xtatildi.[/] Cookie yangilangach menyudan davom ettiring")
+                    break
+                if self._fatal_error:
+                    self._print_with_timestamp("[red]Jarayon to'xtatildi.[/] Xatoni tuzatgach menyudan davom ettiring")
+                    break
+                if self._journal_failed():
+                    # Jurnalsiz davom etish yiqilishda zaxiralarni yo'qotishi mumkin
+                    self._print_with_timestamp("[red]Jarayon to'xtatildi.[/] Diskni tekshirib menyudan davom ettiring")
+                    break
+                if self._quota_reached:
+                    scheduler.mark_exhausted()
+                elif batch:
+                    empty = 0
+                else:
+                    empty += 1
+                    if empty >= self.MAX_EMPTY_BATCHES:
+                        self._print_with_timestamp(
+                            f"[red]Jarayon to'xtatildi:[/] ketma-ket {empty} ta partiyada email olinmadi"
                         )
-                        await asyncio.sleep(1)
-                        delay_seconds -= 1
+                        break
+                    await asyncio.sleep(self._empty_batch_delay(empty))
+
+        if remaining <= 0:
+            scheduler.finish_run()
 
+        await self._sync_journal()
         if emails:
-            await self._save_emails_to_file(emails)
+            self.save_emails_file()
         else:
             self._print_with_timestamp("\n[yellow]Ogohlantirish:[/] Email generatsiya qilinmadi")
 
         return emails
 
+    def _pool_status(self, filling: bool) -> Dict[str, Any]:
+        scheduler = self.scheduler
+        return {
+            "low": config.settings.pool_low,
+            "high": config.settings.pool_high,
+            "filling": filling,
+            "quota_available": scheduler.available(),
+            "next_refill": scheduler.next_slot() if filling else None,
+        }
+
+    async def serve_pool(self, pool: AliasPool, server: PoolServer) -> bool:
+        """Demon rejimi: pulni limit doirasida to'ldirib turadi va API orqali beradi.
+
+        Bo'sh emaillar `pool_low` dan kamayganda to'ldirish boshlanadi va
+        `pool_high` gacha davom etadi. Ctrl+C yoki vazifa bekor qilinguncha
+        ishlaydi; tuzatib bo'lmas xato yoki ketma-ket `MAX_EMPTY_BATCHES` ta bo'sh
+        partiyadan keyin to'xtaydi va False qaytaradi.
+        """
+        scheduler = self.scheduler
+        wake = asyncio.Event()
+        filling = False
+        empty = 0
+
+        def on_take():
+            if pool.available() < config.settings.pool_low:
+                wake.set()
+
+        server.on_take = on_take
+        server.status = lambda: self._pool_status(filling)
+        await server.start()
+        self.journal.start()
+        self._print_with_timestamp(
+            f"[green]✓[/] Pul API: [bold]{server.address}[/] [dim]({pool.available()} ta bo'sh email)[/]"
+        )
+        try:
+            if not await self.preflight():
+                await self.wait_for_cookies("sessiya yaroqsiz")
+            while True:
+                self._reload_settings()
+                low, high = config.settings.pool_low, max(config.settings.pool_low, config.settings.pool_high)
+                free = pool.available()
+                if free < low:
+                    filling = True
+                elif free >= high:
+                    filling = False
+                if not filling:
+                    wake.clear()
+                    try:
+                        # Vaqti-vaqti bilan uyg'onib sozlamalar o'zgarishini tekshirish
+                        await asyncio.wait_for(wake.wait(), timeout=60)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                if not scheduler.available():
+                    await scheduler.wait(lambda target, left: self._reload_settings())
+                    continue
+                if self.session_expiring():
+                    await self.wait_for_cookies(f"cookie {self._format_expiry()}")
+                    continue
+
+                # Har bir email zaxiralanishi bilan pulga: partiya o'rtasida to'xtatilsa ham yo'qolmaydi
+                batch = await self._generate_batch(
+                    min(high - free, scheduler.available()),
+                    on_reserved=lambda email: pool.add([email], label=self.label),
+                )
+                if batch:
+                    self._print_with_timestamp(
+                        f"[green]✓[/] Pulga {len(batch)} ta email qo'shildi [dim](bo'sh: {pool.available()})[/]"
+                    )
+                # Emaillar pul bazasida ham saqlanadi, shuning uchun faqat ogohlantirish
+                self._journal_failed()
+                if self._auth_failed:
+                    # Pul berishda davom etadi, faqat to'ldirish to'xtaydi
+                    await self.wait_for_cookies("server sessiyani rad etdi")
+                elif self._fatal_error:
+                    self._print_with_timestamp("[red]Demon to'xtatildi:[/] tuzatib bo'lmas xato")
+                    return False
+                elif self._quota_reached:
+                    scheduler.mark_exhausted()
+                elif batch:
+                    empty = 0
+                else:
+                    empty += 1
+                    if empty >= self.MAX_EMPTY_BATCHES:
+                        self._print_with_timestamp(
+                            f"[red]Demon to'xtatildi:[/] ketma-ket {empty} ta partiyada email olinmadi"
+                        )
+                        return False
+                    await asyncio.sleep(self._empty_batch_delay(empty))
+        finally:
+            await server.stop()
+            await self._sync_journal()
+
+    @property
+    def alias_store(self) -> AliasStore:
+        """Mahalliy email indeksi (birinchi murojaatda ochiladi)"""
+        if self._alias_store is None:
+            self._alias_store = AliasStore(config.settings.alias_db_file)
+        return self._alias_store
+
+    async def __aenter__(self):
+        await super().__aenter__()
+        if self.metrics_exporter.enabled:
+            await self.metrics_exporter.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.metrics_exporter.stop()
+        try:
+            if self._journal is not None:
+                journal, self._journal = self._journal, None
+                await journal.close()
+        finally:
+            if self._alias_store is not None:
+                self._alias_store.close()
+                self._alias_store = None
+            await super().__aexit__(exc_type, exc_val, exc_tb)
+
+    async def sync_aliases(self, force: bool = False) -> bool:
+        """Mahalliy indeksni serverdan yangilaydi (majburan yoki TTL tugaganda)"""
+        store = self.alias_store
+        if not force and not store.is_stale(config.settings.alias_sync_ttl):
+            age = int(time.time() - store.last_sync)
+            record_list_sync("hit")
+            self._print_with_timestamp(f"[bold cyan]Mahalliy indeksdan o'qilmoqda[/] ({age} soniya oldin yangilangan)")
+            return True
+
+        self._print_with_timestamp("[bold cyan]Email ro'yxati yuklanmoqda...[/]")
+        try:
+            stats = await self.sync_store(store)
+        except HideMyEmailError as e:
+            self._print_with_timestamp(f"[red]✗ Xato:[/] {e.reason}")
+            return False
+
+        self._print_with_timestamp(
+            f"[green]✓[/] Indeks yangilandi: +{stats.added} yangi, "
+            f"~{stats.updated} o'zgargan, -{stats.removed} o'chirilgan"
+        )
+        return True
+
+    def _make_exporter(self) -> Exporter:
+        """config.ini dagi export_* sozlamalari bo'yicha `existing_emails_<vaqt>` fayli"""
+        fmt = config.settings.export_format
+        compression = config.settings.export_compression or None
+        suffix = {"gzip": ".gz", "zstd": ".zst"}.get(compression, "")
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return Exporter(
+            f"existing_emails_{timestamp}.{fmt}{suffix}",
+            fmt=fmt,
+            columns=config.settings.export_columns or None,
+            compression=compression,
+        )
+
     async def list_emails(
         self, 
         active: Optional[bool] = True, 
         search: Optional[str] = None,
-        save_to_file: bool = False
-    ) -> List[Dict[str, Any]]:
+        save_to_file: bool = False,
+        refresh: bool = False,
+        output_format: str = "table"
+    ) -> int:
+        """Ro'yxatni oqim bo'yicha chiqaradi va ko'rsatilgan emaillar sonini qaytaradi.
+
+        `table` - sahifalangan jadval, `ndjson`/`json` - stdout ga mashina uchun.
+        """
         try:
-            self._print_with_timestamp("[bold cyan]Email ro'yxati yuklanmoqda...[/]")
-            
-            gen_res = await self.list_email()
-            if not gen_res:
-                self._print_with_timestamp("[red]✗ Server javob bermadi[/]")
-                return []
-
-            if "success" not in gen_res or not gen_res["success"]:
-                error = gen_res.get("error", {})
-                err_msg = error.get("errorMessage", "Noma'lum xato")
-                self._print_with_timestamp(f"[red]✗ Xato:[/] {err_msg}")
-                return []
-
-            table = Table(title="Yashirin Email Manzillari", show_header=True, header_style="bold magenta")
-            table.add_column("№", style="cyan")
-            table.add_column("Yorliq", style="magenta")
-            table.add_column("Pochta", style="green")
-            table.add_column("Yaratilgan sana", style="blue")
-            table.add_column("Holat", style="white")
-
-            emails_data = []
-            for idx, row in enumerate(gen_res["result"]["hmeEmails"], 1):
-                if active is None or row["isActive"] == active:
-                    label = row.get("label", "N/A")
-                    if search and not re.search(search, label, re.IGNORECASE):
-                        continue
-                        
-                    created = self.time_helper.timestamp_to_str(row["createTimestamp"])
-                    status = "✅ Faol" if row["isActive"] else "❌ No faol"
-                    
-                    table.add_row(str(idx), label, row["hme"], created, status)
-                    emails_data.append({
-                        "number": idx,
-                        "label": label,
-                        "email": row["hme"],
-                        "created": created,
-                        "status": status
-                    })
-
-            self._print_with_timestamp(table)
-            self._print_with_timestamp(f"[green]✓[/] {len(emails_data)} ta email")
-
-            if save_to_file and emails_data:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename = f"existing_emails_{timestamp}.csv"
-                try:
-                    with open(filename, "w", encoding="utf-8") as f:
-                        f.write("№|Yorliq|Pochta|Yaratilgan sana|Holat\n")
-                        for item in emails_data:
-                            f.write(f"{item['number']}|{item['label']}|{item['email']}|{item['created']}|{item['status']}\n")
-                    self._print_with_timestamp(f'[green]✓ {filename} fayliga saqlandi')
-                except Exception as e:
-                    self._print_with_timestamp(f"[red]✗ Xato:[/] {str(e)}")
-
-            return emails_data
+            if not await self.sync_aliases(force=refresh):
+                if not self.alias_store.last_sync:
+                    return 0
+                self._print_with_timestamp("[yellow][!] Mahalliy indeksdagi eski ma'lumotlar ko'rsatilmoqda")
+
+            renderer = make_renderer(
+                output_format,
+                print_func=self._print_progress,
+                page_size=config.settings.page_size,
+                format_time=self.time_helper.timestamp_to_str,
+            )
+            with ExitStack() as stack:
+                exporter = stack.enter_context(self._make_exporter()) if save_to_file else None
+                for row in self.alias_store.query(active, search):
+                    renderer.add(row)
+                    if exporter is not None:
+                        exporter.write(row)
+                count = renderer.close()
+            self._print_with_timestamp(f"[green]✓[/] {count} ta email")
+            if exporter is not None:
+                self._print_with_timestamp(f'[green]✓ {exporter.path} fayliga saqlandi')
+
+            return count
 
         except Exception as e:
             self._print_with_timestamp(f"[red]✗ Xato:[/] {str(e)}")
-            return []
+            return 0
+
+    async def bulk_update(
+        self,
+        action: str,
+        active: Optional[bool] = None,
+        search: Optional[str] = None,
+        label: Optional[str] = None,
+        note: Optional[str] = None,
+        refresh: bool = False,
+        confirm: Optional[Callable[[int], bool]] = None,
+        offline: bool = False,
+    ) -> Optional[Dict[str, Any]]:
+        """Filtrga mos emaillarga `action` ni qo'llaydi va hisobot yozadi.
+
+        `confirm(soni)` False qaytarsa hech narsa yuborilmaydi. Natija -
+        umumiy hisob va hisobot fayli yo'li, bekor qilinsa None.
+        `offline` bo'lsa emaillar faqat mahalliy indeksdan tanlanadi.
+        """
+        self._reload_settings()
+        if not offline and not await self.sync_aliases(force=refresh) and not self.alias_store.last_sync:
+            return None
+        rows = list(self.alias_store.query(active, search))
+        if not rows:
+            self._print_with_timestamp("[yellow][!] Filtrga mos email topilmadi")
+            return None
+        if confirm is not None and not confirm(len(rows)):
+            return None
+
+        operation = BulkOperation(
+            self,
+            action,
+            label=label,
+            note=note,
+            concurrency=config.settings.bulk_concurrency,
+            retry_policy=self.retry_policy,
+            store=self.alias_store,
+            on_retry=self._on_retry(action),
+        )
+        started = time.time()
+        with Progress(
+            "[progress.description]{task.description}",
+            BarColumn(),
+            "[progress.percentage]{task.completed}/{task.total}",
+            TimeRemainingColumn(),
+            console=self.console,
+            transient=True,
+        ) as progress:
+            task = progress.add_task(f"[cyan]{action}", total=len(rows))
+
+            def on_result(result: BulkResult):
+                if result.status == "failed":
+                    self._print_with_timestamp(f"[red]✗[/] {result.hme}: {result.reason}")
+                progress.advance(task)
+
+            results = await operation.run(rows, on_result)
+
+        if operation.stopped is ErrorKind.AUTH:
+            self._auth_failed = True
+            self._print_with_timestamp("[red]✗ Avtorizatsiya xatosi:[/] cookie eskirgan yoki yaroqsiz, cookie.txt ni yangilang")
+        elif operation.stopped is ErrorKind.QUOTA:
+            self._print_with_timestamp("[yellow]⚠️ Ogohlantirish:[/] server limiti, qolgan emaillar o'tkazib yuborildi")
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        report = write_report(
+            Path(config.settings.report_dir) / f"bulk_{action}_{timestamp}.json",
+            action,
+            results,
+            started,
+            filter={"active": active, "search": search},
+        )
+        summary = summarize(results)
+        self._print_with_timestamp(
+            f"[green]✓[/] {action}: {summary['ok']} ta bajarildi, {summary['skipped']} ta o'tkazib yuborildi, "
+            f"{summary['failed']} ta xato [dim]({report})[/]"
+        )
+        return {**summary, "report": str(report)}
 
 async def main():
     console = Console()
+    config.ensure_file()
     
     title = "ICLOUD POCHTA YARATISH MENEDJERI"
     full_line = f"================{title}================"
@@ -268,11 +799,22 @@ async def main():
             console.print("\n[bold]Asosiy menyu:[/]")
             console.print("1. Yangi pochta generatsiya qilish")
             console.print("2. Mavjud pochtalar ro'yhatini olish")
-            console.print("3. Chiqish")
+            console.print("3. Jurnaldan pochtalar faylini tiklash")
+            console.print("4. Ommaviy amallar (yorliq, o'chirib qo'yish, yoqish, o'chirish)")
+            console.print("5. Arxiv: zaxiralarni birlashtirish va server bilan solishtirish")
+            console.print("6. Chiqish")
             
-            choice = IntPrompt.ask("\nTanlovni kiriting", choices=["1", "2", "3"], default=3)
+            choice = IntPrompt.ask("\nTanlovni kiriting", choices=["1", "2", "3", "4", "5", "6"], default=6)
             
             if choice == 1:
+                pending = hme.scheduler.pending_run()
+                if pending and Confirm.ask(
+                    f"Tugallanmagan jarayon topildi ({pending['done']}/{pending['total']}). Davom ettirilsinmi?",
+                    default=True
+                ):
+                    await hme.generate_with_schedule(pending["total"], pending["batch"], resume=True)
+                    continue
+
                 console.print("\n[bold]Generatsiya parametrlarini tanlang:[/]")
                 total = IntPrompt.ask("Generatsiya qilinadigan pochtalar soni", default=750)
                 batch = IntPrompt.ask("Har bir partiyadagi pochtalar soni", default=5)
@@ -282,14 +824,53 @@ async def main():
                 console.print("\n[bold]Ro'yxat parametrlari:[/]")
                 active = Confirm.ask("Faol emaillarni ko'rsatish?", default=True)
                 search = input("Qidiruv uchun kalit so'z (barchasi uchun bo'sh qoldiring): ").strip() or None
-                save = Confirm.ask("CSV fayliga saqlash?", default=False)
-                await hme.list_emails(active, search, save)
+                save = Confirm.ask("Faylga eksport qilish?", default=False)
+                refresh = Confirm.ask("Serverdan yangilash?", default=False)
+                await hme.list_emails(active, search, save, refresh)
                 
             elif choice == 3:
+                hme.save_emails_file()
+                
+            elif choice == 4:
+                console.print("\n[bold]Ommaviy amal parametrlari:[/]")
+                action = Prompt.ask("Amal", choices=list(BULK_ACTIONS), default="relabel")
+                label = Prompt.ask("Yangi yorliq") if action == "relabel" else None
+                state = Prompt.ask("Qaysi emaillar", choices=["active", "inactive", "all"], default="all")
+                search = input("Qidiruv uchun kalit so'z (barchasi uchun bo'sh qoldiring): ").strip() or None
+                await hme.bulk_update(
+                    action,
+                    {"active": True, "inactive": False, "all": None}[state],
+                    search,
+                    label=label,
+                    confirm=lambda count: Confirm.ask(f"{count} ta emailga '{action}' qo'llansinmi?", default=False),
+                )
+
+            elif choice == 5:
+                prune = Confirm.ask("Arxivga o'tkazilgan 30 kundan eski .bak fayllar o'chirilsinmi?", default=False)
+                hme.compact_archive(prune_days=30 if prune else None)
+                if Confirm.ask("Server ro'yxati bilan solishtirilsinmi?", default=True):
+                    await hme.reconcile_archive(
+                        adopt=Confirm.ask("Arxivda yo'q server emaillari qo'shilsinmi?", default=True)
+                    )
+
+            elif choice == 6:
                 console.print("\n[bold green]Dastur tugatildi![/]")
                 break
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="iCloud Yashirin Email Generator")
+    parser.add_argument("--profile", action="store_true", help="Profilash; hisobot dastur tugaganda chiqadi")
+    parser.add_argument(
+        "--profile-mode", choices=profiling.MODES, default="cprofile",
+        help="cprofile - aniq, sample - yengil stek namunalari (standart: cprofile)",
+    )
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
+    args = parse_args()
+    if args.profile:
+        profiling.enable(args.profile_mode, config.settings.profile_dir)
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
@@ -0,0 +1,46 @@
+from icloud.codec import APIResponse, decode_response, network_failure, timeout_failure
+from icloud.errors import INVALID_RESPONSE_CODE, ErrorKind, classify
+
+
+def test_success_body():
+    res = decode_response(b'{"success": true, "result": {"hme": "a@icloud.com"}}', 200)
+    assert res.ok
+    assert res.status == 200
+    assert res.result["hme"] == "a@icloud.com"
+
+
+def test_non_json_body_with_200_is_fatal():
+    res = decode_response(b"<html>login</html>", 200)
+    assert res.error_code == INVALID_RESPONSE_CODE
+    assert classify(res) is ErrorKind.FATAL
+
+
+def test_success_false_with_200_is_fatal():
+    res = decode_response(b'{"success": false}', 200)
+    assert classify(res) is ErrorKind.FATAL
+
+
+def test_local_error_code_in_200_body_is_fatal():
+    res = decode_response(b'{"success": false, "error": {"errorCode": "NETWORK_ERROR"}}', 200)
+    assert classify(res) is ErrorKind.FATAL
+
+
+def test_non_json_body_with_5xx_is_transient():
+    assert classify(decode_response(b"<html>Bad Gateway</html>", 502)) is ErrorKind.TRANSIENT
+
+
+def test_no_response_is_transient():
+    assert classify(network_failure(ConnectionResetError("reset"))) is ErrorKind.TRANSIENT
+    assert classify(timeout_failure()) is ErrorKind.TIMEOUT
+
+
+def test_auth_status_and_retry_after():
+    res = decode_response(b'{"error": "bad"}', 421, {"Retry-After": "3"})
+    assert classify(res) is ErrorKind.AUTH
+    assert res.error_message == "bad"
+    assert res["retry_after"] == 3.0
+
+
+def test_quota_message():
+    res = APIResponse.failure("You have reached the limit of 5 per hour", "x", 200)
+    assert classify(res) is ErrorKind.QUOTA
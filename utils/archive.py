@@ -0,0 +1,253 @@
+"""Yaratilgan emaillarning yagona, takrorsiz arxivi.
+
+Eski versiyalar har saqlashda `generated_emails.txt` ni `backup_dir` ga
+`generated_emails_<vaqt>.bak` nomi bilan ko'chirgan. `compact` shu
+zaxiralarni, joriy `generated_emails.txt` ni va zaxiralar jurnalini bitta
+SQLite jadvaliga birlashtiradi: har bir email bir marta, birinchi
+ko'rilgan vaqti va manbasi bilan. Fayllar qayta o'qilmaydi - o'zgarmagan
+zaxiralar o'tkazib yuboriladi, jurnal esa oxirgi joyidan davom ettiriladi.
+A'zolik tekshiruvi xotiradagi to'plam orqali O(1).
+"""
+
+import re
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from utils.journal import ReservationJournal
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS archive (
+    hme        TEXT PRIMARY KEY,
+    first_seen REAL NOT NULL,
+    source     TEXT NOT NULL,
+    label      TEXT NOT NULL DEFAULT ''
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sources (
+    path   TEXT PRIMARY KEY,
+    size   INTEGER NOT NULL,
+    mtime  REAL NOT NULL,
+    offset INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+_BACKUP_TIMESTAMP = re.compile(r"(\d{8}_\d{6})")
+
+
+def normalize(email: str) -> Optional[str]:
+    """Email ni solishtirish uchun kichik harflarga o'tkazadi; email bo'lmasa None"""
+    email = email.strip().lower()
+    if "@" not in email or any(ch.isspace() for ch in email):
+        return None
+    return email
+
+
+def _backup_time(path: Path) -> float:
+    """`generated_emails_20240101_120000.bak` nomidagi vaqt, bo'lmasa fayl vaqti"""
+    match = _BACKUP_TIMESTAMP.search(path.name)
+    if match:
+        try:
+            return datetime.strptime(match.group(1), "%Y%m%d_%H%M%S").timestamp()
+        except ValueError:
+            pass
+    return path.stat().st_mtime
+
+
+class CompactStats:
+    __slots__ = ("scanned", "skipped", "added", "duplicates", "pruned")
+
+    def __init__(self):
+        self.scanned = 0       # O'qilgan fayllar
+        self.skipped = 0       # O'zgarmagani uchun o'tkazib yuborilgan fayllar
+        self.added = 0         # Arxivga yangi qo'shilgan emaillar
+        self.duplicates = 0    # Arxivda allaqachon bor bo'lgan yozuvlar
+        self.pruned = 0        # O'chirilgan eski .bak fayllar
+
+    def as_dict(self) -> Dict[str, int]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"CompactStats({', '.join(f'{k}={v}' for k, v in self.as_dict().items())})"
+
+
+class ReconcileReport:
+    __slots__ = ("matched", "live_only", "archive_only", "adopted")
+
+    def __init__(self, matched: int, live_only: List[str], archive_only: List[str], adopted: int = 0):
+        self.matched = matched            # Ham arxivda, ham serverda
+        self.live_only = live_only        # Serverda bor, arxivda yo'q (boshqa joyda yaratilgan)
+        self.archive_only = archive_only  # Arxivda bor, serverda yo'q (o'chirilgan yoki yo'qolgan)
+        self.adopted = adopted            # Arxivga qo'shilgan serverdagi emaillar
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class AliasArchive:
+    """Emaillar arxivi (SQLite) va uning xotiradagi a'zolik to'plami"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._members: Optional[Set[str]] = None
+
+    def close(self):
+        self.conn.close()
+
+    @property
+    def members(self) -> Set[str]:
+        if self._members is None:
+            self._members = {row[0] for row in self.conn.execute("SELECT hme FROM archive")}
+        return self._members
+
+    def __contains__(self, email: str) -> bool:
+        key = normalize(email)
+        return key is not None and key in self.members
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def get(self, email: str) -> Optional[Dict[str, Any]]:
+        """Arxivdagi yozuv: birinchi ko'rilgan vaqt, manba va yorliq"""
+        row = self.conn.execute(
+            "SELECT hme, first_seen, source, label FROM archive WHERE hme = ?", (normalize(email) or "",)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"hme": row[0], "first_seen": row[1], "source": row[2], "label": row[3]}
+
+    def add_many(self, entries: Iterable[Tuple[str, float, str, str]]) -> Tuple[int, int]:
+        """(email, vaqt, manba, yorliq) yozuvlarini qo'shadi; (yangi, takroriy) soni.
+
+        Takroriy email uchun eng erta vaqt va uning manbasi saqlanadi,
+        yorliq esa bo'sh bo'lsa to'ldiriladi. Tranzaksiyani chaqiruvchi yopadi.
+        """
+        members = self.members
+        rows = []
+        added = duplicates = 0
+        for email, first_seen, source, label in entries:
+            key = normalize(email)
+            if key is None:
+                continue
+            if key in members:
+                duplicates += 1
+            else:
+                members.add(key)
+                added += 1
+            rows.append((key, first_seen, source, label or ""))
+        self.conn.executemany(
+            "INSERT INTO archive(hme, first_seen, source, label) VALUES(?, ?, ?, ?) "
+            "ON CONFLICT(hme) DO UPDATE SET "
+            "source = CASE WHEN excluded.first_seen < archive.first_seen THEN excluded.source ELSE archive.source END, "
+            "first_seen = MIN(archive.first_seen, excluded.first_seen), "
+            "label = CASE WHEN archive.label = '' THEN excluded.label ELSE archive.label END",
+            rows,
+        )
+        return added, duplicates
+
+    def _source_state(self, path: Path) -> Optional[Tuple[int, float, int]]:
+        row = self.conn.execute("SELECT size, mtime, offset FROM sources WHERE path = ?", (str(path),)).fetchone()
+        return tuple(row) if row else None
+
+    def _set_source_state(self, path: Path, size: int, mtime: float, offset: int = 0):
+        self.conn.execute(
+            "INSERT INTO sources(path, size, mtime, offset) VALUES(?, ?, ?, ?) "
+            "ON CONFLICT(path) DO UPDATE SET size = excluded.size, mtime = excluded.mtime, offset = excluded.offset",
+            (str(path), size, mtime, offset),
+        )
+
+    def _compact_text(self, path: Path, first_seen: float, stats: CompactStats):
+        """Har qatorda bitta email bo'lgan fayl (.bak yoki generated_emails.txt)"""
+        stat = path.stat()
+        if self._source_state(path) == (stat.st_size, stat.st_mtime, 0):
+            stats.skipped += 1
+            return
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            added, duplicates = self.add_many((line, first_seen, path.name, "") for line in f)
+        self._set_source_state(path, stat.st_size, stat.st_mtime)
+        stats.scanned += 1
+        stats.added += added
+        stats.duplicates += duplicates
+
+    def _compact_journal(self, path: Path, stats: CompactStats):
+        state = self._source_state(path)
+        records, offset = ReservationJournal.read_from(path, state[2] if state else 0)
+        if state is not None and offset == state[2]:
+            stats.skipped += 1
+            return
+        added, duplicates = self.add_many(
+            (record["hme"], float(record.get("ts") or 0), path.name, record.get("label") or "")
+            for record in records
+        )
+        stat = path.stat()
+        self._set_source_state(path, stat.st_size, stat.st_mtime, offset)
+        stats.scanned += 1
+        stats.added += added
+        stats.duplicates += duplicates
+
+    def compact(
+        self,
+        backup_dir: Union[str, Path],
+        emails_file: Optional[Union[str, Path]] = None,
+        journal_file: Optional[Union[str, Path]] = None,
+        prune_days: Optional[float] = None,
+    ) -> CompactStats:
+        """Barcha manbalarni arxivga birlashtiradi.
+
+        `prune_days` berilsa, arxivga to'liq o'tkazilgan va shuncha kundan
+        eski `.bak` fayllar o'chiriladi (jurnal va joriy fayl o'chirilmaydi).
+        """
+        stats = CompactStats()
+        backups = sorted(Path(backup_dir).glob("*.bak")) if Path(backup_dir).is_dir() else []
+        try:
+            for path in backups:
+                self._compact_text(path, _backup_time(path), stats)
+            if emails_file and Path(emails_file).is_file():
+                path = Path(emails_file)
+                self._compact_text(path, path.stat().st_mtime, stats)
+            if journal_file and Path(journal_file).is_file():
+                self._compact_journal(Path(journal_file), stats)
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            self._members = None
+            raise
+
+        if prune_days is not None:
+            cutoff = time.time() - prune_days * 86400
+            with self.conn:
+                for path in backups:
+                    stat = path.stat()
+                    if _backup_time(path) < cutoff and self._source_state(path) == (stat.st_size, stat.st_mtime, 0):
+                        path.unlink()
+                        self.conn.execute("DELETE FROM sources WHERE path = ?", (str(path),))
+                        stats.pruned += 1
+        return stats
+
+    def reconcile(self, rows: Iterable[Any], adopt: bool = False) -> ReconcileReport:
+        """Arxivni serverdagi ro'yxat (`AliasStore.query` yozuvlari) bilan solishtiradi.
+
+        `adopt=True` bo'lsa, serverda bor-u arxivda yo'q emaillar arxivga
+        `live` manbasi bilan qo'shiladi.
+        """
+        live: Dict[str, Any] = {}
+        for row in rows:
+            key = normalize(row.hme)
+            if key is not None:
+                live[key] = row
+        members = self.members
+        live_only = sorted(key for key in live if key not in members)
+        archive_only = sorted(key for key in members if key not in live)
+        adopted = 0
+        if adopt and live_only:
+            with self.conn:
+                adopted, _ = self.add_many(
+                    (key, live[key].create_ts / 1000, "live", live[key].label)
+                    for key in live_only
+                )
+        return ReconcileReport(len(live) - len(live_only), live_only, archive_only, adopted)
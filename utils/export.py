@@ -0,0 +1,152 @@
+"""Email ro'yxatini faylga oqim bo'yicha eksport qilish.
+
+Formatlar: RFC-4180 CSV, NDJSON va JSON massiv; ixtiyoriy gzip yoki zstd
+siqish (zstd uchun `zstandard` kutubxonasi kerak). Qatorlar kelishi bilan
+buferlangan holda yoziladi, fayl esa faqat muvaffaqiyatli tugaganda
+o'z nomiga ko'chiriladi. Interaktiv menyu ham, CLI ham shu yo'ldan foydalanadi.
+Qatorlar - `icloud.store.Alias` yozuvlari.
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+from contextlib import ExitStack
+from operator import attrgetter, methodcaller
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Sequence, TextIO, Tuple, Union
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+FORMATS = ("csv", "ndjson", "json")
+COMPRESSIONS = ("gzip", "zstd")
+BUFFER_SIZE = 64 * 1024
+
+
+# Ustun nomi -> `Alias` yozuvidan qiymat olish funksiyasi
+COLUMNS: Dict[str, Callable[[Any], Any]] = {
+    "hme": attrgetter("hme"),
+    "label": attrgetter("label"),
+    "note": attrgetter("note"),
+    "created": methodcaller("created"),
+    "createTimestamp": attrgetter("create_ts"),
+    "isActive": attrgetter("is_active"),
+    "anonymousId": attrgetter("anonymous_id"),
+    "forwardToEmail": attrgetter("forward_to"),
+}
+DEFAULT_COLUMNS = ("hme", "label", "note", "created", "createTimestamp", "isActive", "anonymousId")
+
+_SUFFIX_FORMATS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson", ".json": "json"}
+_SUFFIX_COMPRESSIONS = {".gz": "gzip", ".zst": "zstd"}
+
+
+def detect(path: Union[str, Path]) -> Tuple[str, Optional[str]]:
+    """Fayl kengaytmasidan (format, siqish) ni aniqlaydi, masalan `emails.csv.gz` -> (csv, gzip)"""
+    suffixes = [suffix.lower() for suffix in Path(path).suffixes]
+    compression = _SUFFIX_COMPRESSIONS.get(suffixes[-1]) if suffixes else None
+    if compression:
+        suffixes = suffixes[:-1]
+    fmt = _SUFFIX_FORMATS.get(suffixes[-1], "csv") if suffixes else "csv"
+    return fmt, compression
+
+
+def parse_columns(columns: Optional[Union[str, Sequence[str]]]) -> Tuple[str, ...]:
+    """`hme,label` yoki ro'yxatni tekshirilgan ustunlar kortejiga aylantiradi"""
+    if not columns:
+        return DEFAULT_COLUMNS
+    if isinstance(columns, str):
+        columns = [column.strip() for column in columns.split(",") if column.strip()]
+    unknown = [column for column in columns if column not in COLUMNS]
+    if unknown:
+        raise ValueError(f"Noma'lum ustun(lar): {', '.join(unknown)}. Mavjud: {', '.join(COLUMNS)}")
+    return tuple(columns)
+
+
+class Exporter:
+    """Qatorlarni tanlangan formatda oqim bo'yicha yozuvchi.
+
+        with Exporter("emails.csv.gz", columns="hme,label") as exporter:
+            for row in rows:
+                exporter.write(row)
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        fmt: Optional[str] = None,
+        columns: Optional[Union[str, Sequence[str]]] = None,
+        compression: Optional[str] = "auto",
+    ):
+        self.path = Path(path)
+        detected_fmt, detected_compression = detect(self.path)
+        self.fmt = fmt or detected_fmt
+        self.compression = detected_compression if compression == "auto" else compression
+        if self.fmt not in FORMATS:
+            raise ValueError(f"Noma'lum format: {self.fmt}")
+        if self.compression not in (None, *COMPRESSIONS):
+            raise ValueError(f"Noma'lum siqish turi: {self.compression}")
+        if self.compression == "zstd" and zstandard is None:
+            raise ValueError("zstd uchun 'zstandard' kutubxonasini o'rnating: pip install zstandard")
+        self.columns = parse_columns(columns)
+        self._getters = [COLUMNS[column] for column in self.columns]
+        self.count = 0
+        self._tmp = self.path.with_name(self.path.name + ".tmp")
+        self._stack: Optional[ExitStack] = None
+        self._stream: Optional[TextIO] = None
+        self._csv = None
+
+    def _open(self) -> TextIO:
+        stack = self._stack
+        if self.compression == "gzip":
+            raw = stack.enter_context(open(self._tmp, "wb"))
+            binary = stack.enter_context(gzip.GzipFile(fileobj=raw, mode="wb"))
+        elif self.compression == "zstd":
+            raw = stack.enter_context(open(self._tmp, "wb"))
+            binary = stack.enter_context(zstandard.ZstdCompressor().stream_writer(raw, closefd=False))
+        else:
+            binary = stack.enter_context(open(self._tmp, "wb"))
+        buffered = io.BufferedWriter(binary, BUFFER_SIZE) if self.compression else binary
+        return stack.enter_context(io.TextIOWrapper(buffered, encoding="utf-8", newline=""))
+
+    def __enter__(self) -> "Exporter":
+        self._stack = ExitStack()
+        try:
+            self._stream = self._open()
+        except BaseException:
+            self._stack.close()
+            raise
+        if self.fmt == "csv":
+            self._csv = csv.writer(self._stream, lineterminator="\r\n")
+            self._csv.writerow(self.columns)
+        elif self.fmt == "json":
+            self._stream.write("[")
+        return self
+
+    def write(self, row: Any):
+        values = [getter(row) for getter in self._getters]
+        if self.fmt == "csv":
+            self._csv.writerow(["true" if v is True else "false" if v is False else v for v in values])
+        else:
+            if self.fmt == "json" and self.count:
+                self._stream.write(",")
+            self._stream.write(json.dumps(dict(zip(self.columns, values)), ensure_ascii=False))
+            if self.fmt == "ndjson":
+                self._stream.write("\n")
+        self.count += 1
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            if exc_type is None and self.fmt == "json":
+                self._stream.write("]\n")
+        finally:
+            self._stack.close()
+        if exc_type is None:
+            os.replace(self._tmp, self.path)
+        else:
+            self._tmp.unlink(missing_ok=True)
+        return False
+
@@ -5,7 +5,7 @@ from config.settings import config
 
 class TimeHelper:
     def __init__(self):
-        self.tz = pytz.timezone(config.get("DEFAULT", "timezone"))
+        self.tz = pytz.timezone(config.settings.timezone)
     
     def current_time(self) -> str:
         return datetime.now(self.tz).strftime("%x %X %Z")
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+
+class ReservationJournal:
+    """Zaxiralangan emaillar uchun faqat qo'shiladigan (append-only) JSONL jurnal.
+
+    Har bir zaxira darhol faylga yoziladi; diskka `fsync` esa paketlab,
+    event loopni to'xtatmaslik uchun alohida oqimda bajariladi. Dastur
+    yiqilsa ham jurnaldan `generated_emails.txt` qayta tiklanadi.
+    """
+
+    def __init__(self, path: Union[str, Path], fsync_interval: float = 1.0, fsync_every: int = 20):
+        self.path = Path(path)
+        self.fsync_interval = fsync_interval
+        self.fsync_every = max(1, fsync_every)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._pending = 0
+        self._lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        # Yozish yoki fsync ning oxirgi xatosi; o'qigan tomon uni None ga qaytaradi.
+        # fsync xatosida yozuvlar `_pending` da qoladi va qayta uriniladi
+        self.error: Optional[OSError] = None
+
+    def append(self, email: str, **fields: Any):
+        """Yozuvni jurnalga qo'shadi (OS buferiga darhol, diskka paketda)"""
+        record = {"ts": time.time(), "hme": email, **fields}
+        try:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+        except OSError as e:
+            # Zaxira allaqachon serverda: partiyani yiqitmasdan xatoni chaqiruvchiga qoldirish
+            self.error = e
+            return
+        self._pending += 1
+        if self._pending >= self.fsync_every:
+            # Paket to'ldi: fon vazifasini intervalni kutmasdan uyg'otish
+            self.start()
+            self._wakeup.set()
+
+    async def sync(self):
+        """Yig'ilgan yozuvlarni diskka majburan yozadi.
+
+        Xato `error` ga saqlanadi va qayta ko'tariladi; yozuvlar keyingi chaqiruvda qayta yoziladi.
+        """
+        async with self._lock:
+            if not self._pending or self._file.closed:
+                return
+            pending = self._pending
+            try:
+                self._file.flush()
+                await asyncio.get_running_loop().run_in_executor(None, os.fsync, self._file.fileno())
+            except OSError as e:
+                self.error = e
+                raise
+            # fsync paytida qo'shilgan yozuvlar keyingi paketga qoladi
+            self._pending -= pending
+
+    async def _flusher(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.fsync_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.sync()
+            except OSError:
+                pass  # `error` da saqlangan, chaqiruvchi partiyadan keyin tekshiradi
+
+    def start(self):
+        """Davriy fsync vazifasini ishga tushiradi"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._flusher())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.sync()
+        finally:
+            self._file.close()
+
+    @staticmethod
+    def read(path: Union[str, Path]) -> Iterator[Dict[str, Any]]:
+        """Jurnal yozuvlari; yiqilish paytida chala qolgan oxirgi qator tashlab ketiladi"""
+        path = Path(path)
+        if not path.exists():
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict) and record.get("hme"):
+                    yield record
+
+    @staticmethod
+    def read_from(path: Union[str, Path], offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        """`offset` baytdan keyingi to'liq yozuvlar va keyingi o'qish uchun yangi offset.
+
+        Oxirgi qator hali yozilayotgan bo'lsa (yangi qator belgisisiz) u keyingi safarga qoladi.
+        """
+        records = []
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return records, 0
+        with f:
+            if offset > os.fstat(f.fileno()).st_size:
+                offset = 0  # Fayl qisqargan (qayta yaratilgan) - boshidan o'qish
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                offset += len(line)
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict) and record.get("hme"):
+                    records.append(record)
+        return records, offset
+
+    @classmethod
+    def emails(cls, path: Union[str, Path]) -> List[str]:
+        """Jurnaldagi noyob emaillar, yozilgan tartibda"""
+        seen = {}
+        for record in cls.read(path):
+            seen.setdefault(record["hme"], None)
+        return list(seen)
+
+    @classmethod
+    def rebuild(cls, path: Union[str, Path], target: Union[str, Path]) -> int:
+        """`target` faylini jurnaldagi emaillar bilan atomik qayta yozadi; yozilganlar soni"""
+        emails = cls.emails(path)
+        if not emails:
+            return 0
+        target = Path(target)
+        tmp_file = target.with_name(target.name + ".tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            f.write("\n".join(emails))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, target)
+        return len(emails)
@@ -0,0 +1,289 @@
+"""Prometheus matn formatidagi oddiy metrikalar.
+
+Tashqi kutubxonasiz: hisoblagichlar, gistogrammalar va qiymati
+chaqiruv paytida hisoblanadigan gauge lar. `MetricsExporter` ularni
+faylga davriy yozadi yoki kichik HTTP endpointda (`/metrics`) beradi.
+"""
+
+import asyncio
+import bisect
+import os
+import sys
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels: str) -> float:
+        return self.values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for key, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Qiymati render paytida `func` orqali hisoblanadigan gauge"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, func: Callable[[], float]):
+        super().__init__(name, help_text)
+        self.func = func
+
+    def render(self) -> List[str]:
+        return self.header() + [f"{self.name} {_format_value(self.func())}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label qiymatlari -> (har bir bucket uchun sanoq, yig'indi, soni)
+        self.values: Dict[LabelValues, List] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        state = self.values.get(key)
+        if state is None:
+            state = self.values[key] = [[0] * len(self.buckets), 0.0, 0]
+        idx = bisect.bisect_left(self.buckets, value)
+        if idx < len(self.buckets):
+            state[0][idx] += 1
+        state[1] += value
+        state[2] += 1
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for key, (counts, total, count) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(float(bound))}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            plain = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{plain} {_format_value(total)}")
+            lines.append(f"{self.name}_count{plain} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class RateWindow:
+    """Oxirgi `window` soniyadagi hodisalar soni (masalan, soatiga zaxiralar)"""
+
+    def __init__(self, window: float = 3600.0):
+        self.window = window
+        self.events: Deque[float] = deque()
+
+    def add(self, when: Optional[float] = None):
+        self.events.append(time.time() if when is None else when)
+
+    def count(self) -> int:
+        cutoff = time.time() - self.window
+        while self.events and self.events[0] < cutoff:
+            self.events.popleft()
+        return len(self.events)
+
+
+registry = MetricsRegistry()
+
+REQUEST_DURATION = registry.register(Histogram(
+    "hme_request_duration_seconds",
+    "Hide My Email API so'rovlarining davomiyligi",
+    labelnames=("endpoint",),
+))
+REQUESTS = registry.register(Counter(
+    "hme_requests_total",
+    "Hide My Email API so'rovlari natija bo'yicha (success, quota, auth, timeout, transient, fatal)",
+    labelnames=("endpoint", "result"),
+))
+RETRIES = registry.register(Counter(
+    "hme_retries_total",
+    "Bosqich va xato turi bo'yicha qayta urinishlar",
+    labelnames=("stage", "kind"),
+))
+RESERVED = registry.register(Counter(
+    "hme_aliases_reserved_total",
+    "Muvaffaqiyatli zaxiralangan emaillar",
+))
+LIST_SYNC = registry.register(Counter(
+    "hme_list_sync_total",
+    "Ro'yxat so'rovlari (hit - mahalliy indeks TTL ichida, full - to'liq yuklandi, not_modified - 304)",
+    labelnames=("result",),
+))
+_reserved_window = RateWindow(3600.0)
+registry.register(Gauge(
+    "hme_aliases_reserved_last_hour",
+    "Oxirgi bir soatda zaxiralangan emaillar (soatiga tezlik)",
+    _reserved_window.count,
+))
+
+
+def record_request(endpoint: str, duration: float, result: str):
+    REQUEST_DURATION.observe(duration, endpoint=endpoint)
+    REQUESTS.inc(endpoint=endpoint, result=result)
+
+
+def record_retry(stage: str, kind: str):
+    RETRIES.inc(stage=stage, kind=kind)
+
+
+def record_list_sync(result: str):
+    LIST_SYNC.inc(result=result)
+
+
+def record_reserved():
+    RESERVED.inc()
+    _reserved_window.add()
+
+
+class MetricsExporter:
+    """Metrikalarni faylga davriy yozadi va/yoki HTTP `/metrics` da beradi"""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        port: int = 0,
+        host: str = "127.0.0.1",
+        interval: float = 15.0,
+        metrics: MetricsRegistry = registry,
+    ):
+        self.path = Path(path) if path else None
+        self.port = port
+        self.host = host
+        self.interval = interval
+        self.metrics = metrics
+        self._task: Optional[asyncio.Task] = None
+        self._runner = None
+        # Oxirgi yozish xatosi: bir xil xato har davrda qayta chiqarilmaydi
+        self.error: Optional[OSError] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None or self.port > 0
+
+    def write(self):
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(self.metrics.render(), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def _try_write(self):
+        """Faylga yozadi; xato stderr ga chiqariladi va keyingi davrda qayta uriniladi"""
+        try:
+            self.write()
+        except OSError as e:
+            if self.error is None:
+                print(f"Metrikalar faylga yozilmadi: {e}", file=sys.stderr)
+            self.error = e
+        else:
+            self.error = None
+
+    async def _writer(self):
+        while True:
+            self._try_write()
+            await asyncio.sleep(self.interval)
+
+    async def start(self):
+        if self.path is not None and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._writer())
+        if self.port > 0 and self._runner is None:
+            from aiohttp import web
+
+            async def handle(request):
+                return web.Response(
+                    body=self.metrics.render().encode(),
+                    headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+                )
+
+            app = web.Application()
+            app.router.add_get("/metrics", handle)
+            self._runner = web.AppRunner(app, access_log=None)
+            await self._runner.setup()
+            await web.TCPSite(self._runner, self.host, self.port).start()
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._try_write()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,354 @@
+"""Ichki profilash rejimi (`--profile`).
+
+Uzoq ishlarda vaqt qayerga ketayotganini ko'rsatadi: tarmoqni kutish,
+JSON dekodlash, rich chiqarishi yoki `print_lock` da navbat kutish.
+
+* `cprofile` - standart cProfile, natija `.pstats` faylga (snakeviz,
+  `python -m pstats` bilan ochiladi);
+* `sample` - asosiy oqim stekini har `interval` soniyada o'qiydigan
+  yengil profilyor, natija flamegraph uchun `.folded` faylga;
+* har ikkala rejimda bosqichlar vaqti (`stage`) va event loop kechikishi
+  o'lchanadi, dastur tugaganda qisqa hisobot stderr ga va JSON faylga
+  yoziladi.
+
+Profilash yoqilmagan bo'lsa `stage`/`record` hech narsa qilmaydi.
+"""
+
+import asyncio
+import atexit
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+from typing import Any, ContextManager, Deque, Dict, Iterator, List, Optional, TextIO, Union
+
+MODES = ("cprofile", "sample")
+
+_NULL = nullcontext()
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class StageStats:
+    """Bitta bosqich vaqtlari; foizliklar oxirgi `keep` ta o'lchov bo'yicha"""
+
+    __slots__ = ("count", "total", "max", "recent")
+
+    def __init__(self, keep: int = 4096):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent: Deque[float] = deque(maxlen=keep)
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.recent.append(seconds)
+
+    def as_dict(self) -> Dict[str, float]:
+        recent = list(self.recent)
+        return {
+            "count": self.count,
+            "total": round(self.total, 6),
+            "mean": round(self.total / self.count, 6) if self.count else 0.0,
+            "p50": round(_percentile(recent, 0.50), 6),
+            "p95": round(_percentile(recent, 0.95), 6),
+            "max": round(self.max, 6),
+        }
+
+
+class StageTimer:
+    """Nomlangan bosqichlarning devor vaqti (wall time)"""
+
+    def __init__(self):
+        self.stages: Dict[str, StageStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float):
+        with self._lock:
+            stats = self.stages.get(name)
+            if stats is None:
+                stats = self.stages[name] = StageStats()
+            stats.add(seconds)
+
+    @contextmanager
+    def measure(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {name: stats.as_dict() for name, stats in sorted(self.stages.items())}
+
+
+class LoopLagMonitor:
+    """Event loop kechikishi: `interval` soniyalik uyqu qancha kech uyg'onadi.
+
+    Kechikish `threshold` dan oshsa bu loopni bloklagan sinxron ish
+    (og'ir JSON, katta jadval chiqarish, disk) borligini bildiradi.
+    """
+
+    def __init__(self, interval: float = 0.05, threshold: float = 0.1):
+        self.interval = interval
+        self.threshold = threshold
+        self.lag = StageStats()
+        self.stalls = 0
+        self.worst: List[Dict[str, Any]] = []   # eng katta 5 ta to'xtalish
+        self._tasks: Dict[int, asyncio.Task] = {}
+
+    def watch(self):
+        """Joriy event loopni kuzatishni boshlaydi (har bir loop uchun bir marta)"""
+        loop = asyncio.get_running_loop()
+        task = self._tasks.get(id(loop))
+        if task is None or task.done():
+            self._tasks[id(loop)] = loop.create_task(self._run())
+
+    async def _run(self):
+        interval = self.interval
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            lag = max(0.0, time.perf_counter() - started - interval)
+            self.lag.add(lag)
+            if lag >= self.threshold:
+                self.stalls += 1
+                self.worst.append({"at": datetime.now().isoformat(timespec="seconds"), "lag": round(lag, 4)})
+                self.worst.sort(key=lambda item: item["lag"], reverse=True)
+                del self.worst[5:]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            **self.lag.as_dict(),
+            "interval": self.interval,
+            "threshold": self.threshold,
+            "stalls": self.stalls,
+            "worst": self.worst,
+        }
+
+
+class SamplingProfiler:
+    """Asosiy oqim stekini davriy o'qiydigan profilyor (cProfile dan ancha yengil)"""
+
+    def __init__(self, interval: float = 0.005, thread_id: Optional[int] = None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.main_thread().ident
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+
+    def top(self, limit: int = 15) -> List[Dict[str, Any]]:
+        """Eng ko'p uchragan funksiyalar (stek tepasi bo'yicha - o'z vaqti)"""
+        own: Counter = Counter()
+        for stack, count in self.stacks.items():
+            own[stack.rsplit(";", 1)[-1]] += count
+        total = self.samples or 1
+        return [
+            {"function": name, "samples": count, "share": round(count / total, 4)}
+            for name, count in own.most_common(limit)
+        ]
+
+    def write_folded(self, path: Path):
+        """flamegraph.pl / speedscope uchun `stek;stek;funksiya soni` formati"""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class ProfileSession:
+    """Bitta ishga tushirishning profili: profilyor, bosqichlar va loop kechikishi"""
+
+    def __init__(self, mode: str = "cprofile", output_dir: Union[str, Path] = "profiles", interval: float = 0.005):
+        if mode not in MODES:
+            raise ValueError(f"Noma'lum profil rejimi: {mode}. Mavjud: {', '.join(MODES)}")
+        self.mode = mode
+        self.output_dir = Path(output_dir)
+        self.timer = StageTimer()
+        self.loop_monitor = LoopLagMonitor()
+        self.started = time.time()
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        self._profile: Optional[cProfile.Profile] = None
+        self._sampler: Optional[SamplingProfiler] = None
+        self._stopped = False
+        if mode == "cprofile":
+            self._profile = cProfile.Profile()
+        else:
+            self._sampler = SamplingProfiler(interval)
+
+    def start(self):
+        if self._profile is not None:
+            self._profile.enable()
+        if self._sampler is not None:
+            self._sampler.start()
+
+    def _top_functions(self, limit: int = 15) -> List[Dict[str, Any]]:
+        if self._sampler is not None:
+            return self._sampler.top(limit)
+        stats = pstats.Stats(self._profile, stream=io.StringIO())
+        rows = []
+        for (filename, line, name), (_, calls, own, cumulative, _) in stats.stats.items():
+            rows.append({
+                "function": f"{name} ({os.path.basename(filename)}:{line})",
+                "calls": calls,
+                "own": round(own, 6),
+                "cumulative": round(cumulative, 6),
+            })
+        rows.sort(key=lambda row: row["own"], reverse=True)
+        return rows[:limit]
+
+    def stop(self) -> Dict[str, Any]:
+        """Profilyorni to'xtatadi, fayllarni yozadi va hisobotni qaytaradi"""
+        if self._profile is not None:
+            self._profile.disable()
+        if self._sampler is not None:
+            self._sampler.stop()
+        self._stopped = True
+        summary = {
+            "mode": self.mode,
+            "started": datetime.fromtimestamp(self.started).isoformat(timespec="seconds"),
+            "wall": round(time.perf_counter() - self._wall, 3),
+            "cpu": round(time.process_time() - self._cpu, 3),
+            "argv": sys.argv,
+            "stages": self.timer.as_dict(),
+            "loop_lag": self.loop_monitor.as_dict(),
+            "top": self._top_functions(),
+        }
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        stem = self.output_dir / f"profile_{datetime.fromtimestamp(self.started).strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+        if self._profile is not None:
+            summary["profile"] = str(stem.with_suffix(".pstats"))
+            self._profile.dump_stats(summary["profile"])
+        else:
+            summary["profile"] = str(stem.with_suffix(".folded"))
+            summary["samples"] = self._sampler.samples
+            self._sampler.write_folded(Path(summary["profile"]))
+        summary["summary"] = str(stem.with_suffix(".json"))
+        tmp = Path(summary["summary"] + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, summary["summary"])
+        return summary
+
+    @property
+    def stopped(self) -> bool:
+        return self._stopped
+
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    """Hisobotning qisqa matnli ko'rinishi (xato hisobotiga qo'shish uchun)"""
+    lines = [
+        f"Profil ({summary['mode']}): devor vaqti {summary['wall']:.2f}s, CPU {summary['cpu']:.2f}s",
+        "",
+        "{:<22}{:>8}{:>10}{:>10}{:>10}{:>10}".format("bosqich", "soni", "jami, s", "o'rtacha", "p95", "max"),
+    ]
+    for name, stats in summary["stages"].items():
+        lines.append(
+            f"{name:<22}{stats['count']:>8}{stats['total']:>10.3f}"
+            f"{stats['mean'] * 1000:>8.1f}ms{stats['p95'] * 1000:>8.1f}ms{stats['max'] * 1000:>8.1f}ms"
+        )
+    lag = summary["loop_lag"]
+    lines += [
+        "",
+        f"Event loop kechikishi: o'rtacha {lag['mean'] * 1000:.1f}ms, p95 {lag['p95'] * 1000:.1f}ms, "
+        f"max {lag['max'] * 1000:.1f}ms, {lag['stalls']} ta to'xtalish (>{lag['threshold'] * 1000:.0f}ms)",
+        "",
+        "Eng ko'p vaqt olgan funksiyalar:",
+    ]
+    for row in summary["top"][:10]:
+        if "own" in row:
+            lines.append(f"  {row['own']:>9.3f}s  {row['calls']:>8}  {row['function']}")
+        else:
+            lines.append(f"  {row['share'] * 100:>8.1f}%  {row['samples']:>8}  {row['function']}")
+    lines += ["", f"Fayllar: {summary['summary']}, {summary['profile']}"]
+    return "\n".join(lines)
+
+
+_session: Optional[ProfileSession] = None
+
+
+def enable(
+    mode: str = "cprofile",
+    output_dir: Union[str, Path] = "profiles",
+    stream: Optional[TextIO] = None,
+) -> ProfileSession:
+    """Profilashni yoqadi; hisobot dastur tugaganda `stream` ga (standart - stderr) chiqadi"""
+    global _session
+    if _session is not None:
+        return _session
+    _session = ProfileSession(mode, output_dir)
+    _session.start()
+
+    def finish():
+        if _session is None or _session.stopped:
+            return
+        summary = _session.stop()
+        out = stream or sys.stderr
+        out.write("\n" + format_summary(summary) + "\n")
+        out.flush()
+
+    atexit.register(finish)
+    return _session
+
+
+def active() -> Optional[ProfileSession]:
+    return _session
+
+
+def stage(name: str) -> ContextManager[None]:
+    """Bosqich vaqtini o'lchash: `with stage("reserve"): ...` (o'chirilgan bo'lsa bo'sh)"""
+    if _session is None:
+        return _NULL
+    return _session.timer.measure(name)
+
+
+def record(name: str, seconds: float):
+    if _session is not None:
+        _session.timer.record(name, seconds)
+
+
+def watch_loop():
+    """Joriy event loop uchun kechikish monitorini ishga tushiradi (yoqilgan bo'lsa)"""
+    if _session is not None:
+        _session.loop_monitor.watch()
@@ -0,0 +1,118 @@
+"""Email ro'yxatini oqim bo'yicha chiqaruvchi rendererlar.
+
+Har bir renderer qatorlarni `add` orqali birma-bir qabul qiladi va ularni
+darhol (NDJSON) yoki sahifa to'lganda (jadval) chiqaradi, shuning uchun
+butun ro'yxat xotirada yig'ilmaydi. rich faqat jadval rejimida yuklanadi.
+Qatorlar - `icloud.store.Alias` yozuvlari; sana faqat jadvalga chiqarilayotgan
+qatorlar uchun formatlanadi.
+"""
+
+import json
+import sys
+from typing import Any, Callable, List, Optional, TextIO
+
+FORMATS = ("table", "ndjson", "json")
+
+
+class NDJSONRenderer:
+    """Har bir qatorni alohida JSON qator sifatida yozadi"""
+
+    def __init__(self, stream: TextIO = sys.stdout):
+        self.stream = stream
+        self.count = 0
+
+    def add(self, row: Any):
+        self.stream.write(json.dumps(row.as_dict(), ensure_ascii=False))
+        self.stream.write("\n")
+        self.count += 1
+
+    def close(self) -> int:
+        self.stream.flush()
+        return self.count
+
+
+class JSONArrayRenderer(NDJSONRenderer):
+    """Bitta JSON massiv, lekin qatorlar kelishi bilan yoziladi"""
+
+    def add(self, row: Any):
+        self.stream.write("[" if not self.count else ",")
+        self.stream.write(json.dumps(row.as_dict(), ensure_ascii=False))
+        self.count += 1
+
+    def close(self) -> int:
+        self.stream.write("[]\n" if not self.count else "]\n")
+        return super().close()
+
+
+class TableRenderer:
+    """Odamlar uchun sahifalangan rich jadval: har `page_size` qatorda bitta jadval"""
+
+    def __init__(
+        self,
+        print_func: Optional[Callable[..., None]] = None,
+        page_size: int = 50,
+        format_time: Optional[Callable[[int], str]] = None,
+        title: str = "Yashirin Email Manzillari",
+    ):
+        if print_func is None:
+            from rich.console import Console
+
+            print_func = Console().print
+        if format_time is None:
+            from utils.helpers import TimeHelper
+
+            format_time = TimeHelper().timestamp_to_str
+        self.print_func = print_func
+        self.page_size = max(1, page_size)
+        self.format_time = format_time
+        self.title = title
+        self.count = 0
+        self._page: List[Any] = []
+
+    def add(self, row: Any):
+        self._page.append(row)
+        self.count += 1
+        if len(self._page) >= self.page_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._page:
+            return
+        from rich.table import Table
+
+        first = self.count - len(self._page) + 1
+        table = Table(
+            title=f"{self.title} ({first}-{self.count})",
+            show_header=True,
+            header_style="bold magenta",
+        )
+        table.add_column("№", style="cyan")
+        table.add_column("Yorliq", style="magenta")
+        table.add_column("Pochta", style="green")
+        table.add_column("Yaratilgan sana", style="blue")
+        table.add_column("Holat", style="white")
+        for number, row in enumerate(self._page, first):
+            table.add_row(
+                str(number),
+                row.label,
+                row.hme,
+                row.created(self.format_time),
+                "✅ Faol" if row.is_active else "❌ No faol",
+            )
+        self.print_func(table)
+        self._page = []
+
+    def close(self) -> int:
+        self._flush()
+        return self.count
+
+
+def make_renderer(fmt: str, stream: TextIO = sys.stdout, **table_options: Any):
+    """`fmt` bo'yicha renderer: table, ndjson yoki json"""
+    if fmt == "ndjson":
+        return NDJSONRenderer(stream)
+    if fmt == "json":
+        return JSONArrayRenderer(stream)
+    if fmt == "table":
+        return TableRenderer(**table_options)
+    raise ValueError(f"Noma'lum format: {fmt}")
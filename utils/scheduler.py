@@ -0,0 +1,133 @@
+import asyncio
+import bisect
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+
+class QuotaScheduler:
+    """Serverning siljuvchi limit oynasini kuzatuvchi rejalashtiruvchi.
+
+    Har bir zaxiralash vaqti holat fayliga yoziladi, shuning uchun dastur
+    qayta ishga tushganda ham keyingi partiya qachon ruxsat etilishi aniq
+    hisoblanadi. Tugallanmagan jarayon (jami/partiya/bajarilgan) ham shu
+    faylda saqlanadi.
+    """
+
+    # Uzoq kutishda soat sakrashlari (uyqu rejimi va h.k.) uchun qayta tekshirish oralig'i
+    MAX_SLEEP_CHUNK = 60.0
+    # Zaxiralar tarixi kamida shuncha saqlanadi: oyna qisqartirilib keyin yana
+    # kengaytirilsa ham limit to'g'ri hisoblanadi
+    HISTORY_SECONDS = 7 * 24 * 3600.0
+
+    def __init__(self, state_file: Union[str, Path], window_seconds: float, quota: int):
+        self.state_file = Path(state_file)
+        self.window = float(window_seconds)
+        self.quota = max(1, int(quota))
+        self.reservations: List[float] = []
+        self.blocked_until = 0.0
+        self.run: Optional[Dict[str, Any]] = None
+        self._load()
+
+    def configure(self, window_seconds: float, quota: int):
+        """Oyna va limitni ish davomida o'zgartirish (saqlangan holat o'zgarmaydi)"""
+        self.window = float(window_seconds)
+        self.quota = max(1, int(quota))
+
+    def _load(self):
+        try:
+            state = json.loads(self.state_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        self.reservations = sorted(float(ts) for ts in state.get("reservations", []))
+        self.blocked_until = float(state.get("blocked_until", 0.0))
+        self.run = state.get("run")
+        self._prune(time.time())
+
+    def _save(self):
+        state = {
+            "reservations": self.reservations,
+            "blocked_until": self.blocked_until,
+            "run": self.run,
+        }
+        tmp = self.state_file.with_name(self.state_file.name + ".tmp")
+        tmp.write_text(json.dumps(state), encoding="utf-8")
+        os.replace(tmp, self.state_file)
+
+    def _prune(self, now: float):
+        """Faqat saqlash muddatidan eski yozuvlarni tashlaydi (joriy oyna bo'yicha emas)"""
+        cutoff = now - max(self.window, self.HISTORY_SECONDS)
+        if self.reservations and self.reservations[0] <= cutoff:
+            self.reservations = self.reservations[bisect.bisect_right(self.reservations, cutoff):]
+
+    def _in_window(self, now: float) -> List[float]:
+        """Joriy oynadagi zaxiralar (eskisi birinchi)"""
+        return self.reservations[bisect.bisect_right(self.reservations, now - self.window):]
+
+    def record(self, when: Optional[float] = None):
+        """Bitta muvaffaqiyatli zaxiralashni qayd etadi"""
+        now = time.time() if when is None else when
+        bisect.insort(self.reservations, now)
+        self._prune(now)
+        self._save()
+
+    def mark_exhausted(self, when: Optional[float] = None):
+        """Server limit xatosini qaytardi: oynada boshqa qurilmalardan ham zaxiralar bo'lishi mumkin.
+
+        Limitning aniq tugash vaqti noma'lum, shuning uchun keyingi urinish
+        bitta slot bo'shashi uchun o'rtacha vaqtdan keyin qilinadi.
+        """
+        now = time.time() if when is None else when
+        self.blocked_until = max(self.blocked_until, now + self.window / self.quota)
+        self._save()
+
+    def available(self, now: Optional[float] = None) -> int:
+        """Hozir oynada qolgan bo'sh joylar soni"""
+        now = time.time() if now is None else now
+        if now < self.blocked_until:
+            return 0
+        return max(0, self.quota - len(self._in_window(now)))
+
+    def next_slot(self, now: Optional[float] = None) -> float:
+        """Keyingi zaxiralashga ruxsat beriladigan vaqt (unix soniya)"""
+        now = time.time() if now is None else now
+        if now < self.blocked_until:
+            return self.blocked_until
+        reservations = self._in_window(now)
+        if len(reservations) < self.quota:
+            return now
+        # Eng eski zaxira oynadan chiqqanda bitta joy bo'shaydi
+        return reservations[-self.quota] + self.window
+
+    async def wait(self, on_wait: Optional[Callable[[float, float], None]] = None):
+        """Keyingi slotgacha uxlaydi; `on_wait(target, remaining)` daqiqada ko'pi bilan bir marta chaqiriladi"""
+        while True:
+            now = time.time()
+            target = self.next_slot(now)
+            remaining = target - now
+            if remaining <= 0:
+                return
+            if on_wait is not None:
+                on_wait(target, remaining)
+            await asyncio.sleep(min(remaining, self.MAX_SLEEP_CHUNK))
+
+    def start_run(self, total: int, batch_size: int):
+        self.run = {"total": total, "batch": batch_size, "done": 0, "started": time.time()}
+        self._save()
+
+    def update_run(self, done: int):
+        if self.run is not None:
+            self.run["done"] = done
+            self._save()
+
+    def finish_run(self):
+        self.run = None
+        self._save()
+
+    def pending_run(self) -> Optional[Dict[str, Any]]:
+        """Tugallanmagan jarayon bo'lsa uning holati"""
+        if self.run and self.run.get("done", 0) < self.run.get("total", 0):
+            return self.run
+        return None